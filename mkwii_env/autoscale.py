@@ -0,0 +1,326 @@
+import json
+import os
+import platform
+import threading
+import time
+
+import yaml
+
+from actions import GCAction
+from mkwii_env import MKWiiEnv
+from vec_env import MKWiiVecEnv
+
+
+DEFAULT_STATE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "mkwii_env", "autoscale.json")
+
+
+def host_profile() -> str:
+    """Machine type the learned optimum is stored under: CPU model, logical CPUs and memory size."""
+    model = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            model = next(line.split(":", 1)[1].strip() for line in cpuinfo if line.startswith("model name"))
+    except (OSError, StopIteration):
+        pass
+    memory_gb = round(meminfo()["MemTotal"] / 2**30)
+    return f"{model} / {os.cpu_count()} CPUs / {memory_gb} GB"
+
+
+def meminfo() -> dict[str, int]:
+    """`/proc/meminfo` in bytes."""
+    with open("/proc/meminfo") as lines:
+        return {line.split(":")[0]: int(line.split()[1]) * 1024 for line in lines}
+
+
+def pressure(resource: str) -> float | None:
+    """Share of the last 10 s some task stalled on `resource` ("cpu" or "memory"), in %, or None without PSI."""
+    try:
+        with open(f"/proc/pressure/{resource}") as psi:
+            some = psi.readline().split()
+    except OSError:
+        return None
+    return float(some[1].split("=")[1])
+
+
+def rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class InstanceLaunch(threading.Thread):
+    """Boots the `MKWiiEnv` of autoscaler slot `slot` in the background; `env` or `error` is set once done."""
+
+    def __init__(self, slot: int, dolphin_config: dict):
+        super().__init__(daemon=True)
+        self.slot = slot
+        self.dolphin_config = dolphin_config
+        self.env = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.env = MKWiiEnv(dolphin_config=self.dolphin_config)
+        except Exception as e:
+            self.error = e
+
+
+class Autoscaler:
+    """
+    Finds and holds the number of instances that maximizes a host's aggregate steps/sec.
+
+    `tune()` grows the pool one instance at a time, measuring aggregate throughput for `window`
+    seconds at each size, and stops when an extra instance adds less than `min_gain` of an average
+    instance's throughput, or when the host runs short of memory (less than `memory_reserve` of it
+    available, counting the next instance) or shows CPU/memory stalls above `pressure_limit` (Linux
+    PSI, in %). The resulting throughput curve and optimum are stored per `host_profile()` in
+    `state_path`, and the next run on the same kind of machine starts from the stored optimum.
+
+    While training, call `tick(steps)` after every `vec_env.step`: every `window` seconds it records
+    the throughput at the current size, sheds an instance under pressure, and every `probe_every`
+    windows tries one instance more or less, keeping the change only if the curve says it pays.
+    Instances are added without stalling training: they boot in background threads and join the
+    pool on the first `tick` after they are up. `tick` returns the new pool size whenever the pool
+    changed (None otherwise), and the training loop must then resize whatever it keeps per instance.
+
+    Args:
+        vec_env (MKWiiVecEnv): The pool, without a batch buffer.
+        make_config (callable): `make_config(slot)` returns the `MKWiiEnv` config of instance slot `slot` (0 to `max_instances - 1`).
+        min_instances, max_instances (int): Bounds of the pool size.
+        window (float): Seconds per throughput measurement.
+        min_gain (float): Fraction of the average per-instance throughput an extra instance must add.
+        memory_reserve (float): Fraction of the host memory kept available.
+        pressure_limit (float): PSI "some avg10" above which the pool sheds an instance.
+        probe_every (int): Windows between probes while training (0: never).
+    """
+
+    def __init__(
+        self,
+        vec_env: MKWiiVecEnv,
+        make_config,
+        min_instances=1,
+        max_instances=None,
+        window=10.0,
+        min_gain=0.25,
+        memory_reserve=0.1,
+        pressure_limit=25.0,
+        probe_every=30,
+        state_path=DEFAULT_STATE_PATH,
+        profile=None,
+    ):
+        self.vec_env = vec_env
+        self.make_config = make_config
+        self.min_instances = min_instances
+        self.max_instances = os.cpu_count() if max_instances is None else max_instances
+        self.window = window
+        self.min_gain = min_gain
+        self.memory_reserve = memory_reserve
+        self.pressure_limit = pressure_limit
+        self.probe_every = probe_every
+        self.state_path = state_path
+        self.profile = host_profile() if profile is None else profile
+        self.slots = [None] * vec_env.num_envs  # slot of each instance, None for those not launched here
+        self.launching = []  # InstanceLaunch of the instances booting for the pool
+        self.abandoned = []  # InstanceLaunch no longer wanted, closed once booted
+        self.throughput = {}  # pool size -> aggregate steps/sec
+        self.optimum = None
+        self.load()
+
+        self.window_start = time.monotonic()
+        self.window_steps = 0
+        self.settling = True  # the first window after a resize includes the boot, it is not recorded
+        self.windows = 0
+        self.probe = None  # pool size before the probe in progress
+        self.probe_up = True
+
+    @classmethod
+    def from_config(cls, config_path="dolphin_config.yaml", **autoscaler):
+        """Autoscale an empty pool over the `DOLPHIN_IDS` of `dolphin_config.yaml`, which bound its size."""
+        config = yaml.safe_load(open(config_path, "r"))
+        dolphin_ids = config["DOLPHIN_IDS"]
+        autoscaler.setdefault("max_instances", len(dolphin_ids))
+        return cls(MKWiiVecEnv([]), lambda slot: MKWiiVecEnv.dolphin_config(config, dolphin_ids[slot]), **autoscaler)
+
+    def load(self):
+        if not os.path.exists(self.state_path):
+            return
+        with open(self.state_path) as state_file:
+            state = json.load(state_file).get(self.profile)
+        if state is not None:
+            self.throughput = {int(size): steps_per_sec for size, steps_per_sec in state["throughput"].items()}
+            self.optimum = state["optimum"]
+
+    def save(self):
+        states = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as state_file:
+                states = json.load(state_file)
+        states[self.profile] = {"optimum": self.optimum, "throughput": self.throughput, "updated": time.time()}
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with open(self.state_path, "w") as state_file:
+            json.dump(states, state_file, indent=2)
+
+    def target_size(self) -> int:
+        """Pool size once the instances booting have joined."""
+        return self.vec_env.num_envs + len(self.launching)
+
+    def scale_to(self, size: int, wait=False):
+        """
+        Resize the pool towards `size` (within the bounds). Removals are immediate; additions boot in
+        the background and join on a later `add_booted`, or before returning with `wait`.
+        """
+        size = min(max(size, self.min_instances), self.max_instances)
+        while self.target_size() > size and self.launching:
+            self.abandoned.append(self.launching.pop())
+        while self.vec_env.num_envs > size:
+            self.vec_env.remove_instance()
+            self.slots.pop()
+        while self.target_size() < size and self.abandoned:
+            self.launching.append(self.abandoned.pop())
+        while self.target_size() < size:
+            slot = min(set(range(self.max_instances)) - set(self.slots) - {launch.slot for launch in self.launching})
+            launch = InstanceLaunch(slot, self.make_config(slot))
+            launch.start()
+            self.launching.append(launch)
+        if wait:
+            for launch in self.launching:
+                launch.join()
+            self.add_booted()
+        self.restart_window()
+
+    def add_booted(self) -> bool:
+        """Add the instances done booting to the pool. Returns whether it grew."""
+        grew = False
+        for launch in [launch for launch in self.launching if not launch.is_alive()]:
+            self.launching.remove(launch)
+            if launch.error is not None:
+                print(f"Instance slot {launch.slot} failed to boot ({launch.error}), not adding it.")
+                continue
+            self.vec_env.add_env(launch.env)
+            self.slots.append(launch.slot)
+            grew = True
+        for launch in [launch for launch in self.abandoned if not launch.is_alive()]:
+            self.abandoned.remove(launch)
+            if launch.env is not None:
+                launch.env.close()
+        return grew
+
+    def close(self):
+        """Close the instances still booting; the pool itself is closed with `vec_env.close()`."""
+        for launch in self.launching + self.abandoned:
+            launch.join()
+            if launch.env is not None:
+                launch.env.close()
+        self.launching = []
+        self.abandoned = []
+
+    def restart_window(self):
+        self.window_start = time.monotonic()
+        self.window_steps = 0
+        self.settling = True
+
+    def under_pressure(self, adding=False) -> bool:
+        memory = meminfo()
+        available = memory["MemAvailable"]
+        if adding and self.vec_env.num_envs:
+            # The next instance will take about as much as the running ones.
+            dolphins = [env.dolphin.dolphin for env in self.vec_env.envs if env.dolphin.is_running()]
+            if dolphins:
+                available -= sum(rss_bytes(dolphin.pid) for dolphin in dolphins) / len(dolphins)
+        if available < self.memory_reserve * memory["MemTotal"]:
+            return True
+        return any((pressure(resource) or 0.0) > self.pressure_limit for resource in ("cpu", "memory"))
+
+    def worth_it(self, size: int) -> bool:
+        """Whether `size` instances beat `size - 1` by the required marginal gain."""
+        smaller = self.throughput.get(size - 1)
+        if smaller is None or size - 1 == 0:
+            return True
+        return self.throughput[size] - smaller >= self.min_gain * smaller / (size - 1)
+
+    def best_size(self) -> int:
+        size = min(self.throughput)
+        while size + 1 in self.throughput and self.worth_it(size + 1):
+            size += 1
+        return size
+
+    def record(self, steps_per_sec: float):
+        size = self.vec_env.num_envs
+        previous = self.throughput.get(size)
+        self.throughput[size] = steps_per_sec if previous is None else (previous + steps_per_sec) / 2
+
+    def measure(self, action=None) -> float:
+        """Step the whole pool with `action` (neutral by default) for one settling and one measured window."""
+        action = GCAction() if action is None else action
+        for settling in (True, False):
+            start = time.monotonic()
+            steps = 0
+            while time.monotonic() - start < self.window:
+                self.vec_env.step([action] * self.vec_env.num_envs)
+                steps += self.vec_env.num_envs
+            if not settling:
+                self.record(steps / (time.monotonic() - start))
+        return self.throughput[self.vec_env.num_envs]
+
+    def tune(self, action=None, log=print) -> int:
+        """Search the best pool size from the stored optimum (or `min_instances`) upward. Returns it."""
+        size = self.min_instances if self.optimum is None else max(self.optimum - 1, self.min_instances)
+        self.throughput = {}
+        self.scale_to(size, wait=True)
+        log(f"{self.vec_env.num_envs} instances: {self.measure(action):.0f} steps/s")
+        while self.vec_env.num_envs < self.max_instances and not self.under_pressure(adding=True):
+            self.scale_to(self.vec_env.num_envs + 1, wait=True)
+            log(f"{self.vec_env.num_envs} instances: {self.measure(action):.0f} steps/s")
+            if not self.worth_it(self.vec_env.num_envs) or self.under_pressure():
+                break
+        self.optimum = self.best_size()
+        self.scale_to(self.optimum, wait=True)
+        self.save()
+        log(f"Settled on {self.optimum} instances ({self.profile})")
+        return self.optimum
+
+    def tick(self, steps: int | None = None) -> int | None:
+        """
+        Count `steps` (default: one per instance) and act at the end of a measurement window.
+
+        Returns:
+            The new `vec_env.num_envs` if the pool changed during this call, else None.
+        """
+        size = self.vec_env.num_envs
+        if self.add_booted():
+            self.restart_window()
+            return self.vec_env.num_envs
+        if self.launching:
+            # Windows resume once the new instances have joined, their boot would skew them.
+            return None
+        self.window_steps += size if steps is None else steps
+        elapsed = time.monotonic() - self.window_start
+        if elapsed < self.window:
+            return None
+        steps_per_sec = self.window_steps / elapsed
+        settling = self.settling
+        self.restart_window()
+        self.settling = False
+        if settling:
+            return None
+        self.record(steps_per_sec)
+        self.windows += 1
+
+        if size > self.min_instances and self.under_pressure():
+            self.probe = None
+            self.scale_to(size - 1)
+        elif self.probe is not None:
+            # Keep the probed size only if the curve prefers it.
+            best = self.best_size()
+            self.probe = None
+            if best != size:
+                self.scale_to(best)
+            if best != self.optimum:
+                self.optimum = best
+                self.save()
+        elif self.probe_every and self.windows % self.probe_every == 0:
+            target = size + 1 if self.probe_up else size - 1
+            self.probe_up = not self.probe_up
+            if self.min_instances <= target <= self.max_instances and not (target > size and self.under_pressure(adding=True)):
+                self.probe = size
+                self.scale_to(target)
+        return None if self.vec_env.num_envs == size else self.vec_env.num_envs
@@ -0,0 +1,113 @@
+import numpy as np
+
+import shm
+
+
+def layout(num_envs: int, height: int, width: int, channels: int) -> list[tuple[str, tuple, type]]:
+    """
+    Arrays of a double-buffered batch, laid out back to back (64-byte aligned) in one shared memory
+    segment. The leading axis of every array is the buffer index (0 or 1), the next one the instance.
+    """
+    return [
+        ("frames", (2, num_envs, height, width, channels), np.uint8),
+        ("frame_count", (2, num_envs), np.int64),
+        ("skipped_frames", (2, num_envs), np.int64),
+        ("sizes", (2, num_envs, 2), np.int32),  # width, height actually drawn
+    ]
+
+
+def aligned_size(shape: tuple, dtype) -> int:
+    return -(-int(np.prod(shape)) * np.dtype(dtype).itemsize // 64) * 64
+
+
+def packed_size(arrays_layout: list[tuple[str, tuple, type]]) -> int:
+    return sum(aligned_size(shape, dtype) for _, shape, dtype in arrays_layout)
+
+
+def packed_views(buffer, arrays_layout: list[tuple[str, tuple, type]]) -> dict[str, np.ndarray]:
+    """Numpy views of the arrays of `arrays_layout`, packed back to back in `buffer`."""
+    arrays = {}
+    offset = 0
+    for name, shape, dtype in arrays_layout:
+        arrays[name] = np.ndarray(shape, dtype, buffer, offset)
+        offset += aligned_size(shape, dtype)
+    return arrays
+
+
+def nbytes(num_envs: int, height: int, width: int, channels: int) -> int:
+    return packed_size(layout(num_envs, height, width, channels))
+
+
+def views(buffer, num_envs: int, height: int, width: int, channels: int) -> dict[str, np.ndarray]:
+    return packed_views(buffer, layout(num_envs, height, width, channels))
+
+
+def write_frame(target: np.ndarray, size: np.ndarray, frame: tuple[int, int, bytes]):
+    """Copy `(width, height, data)` into the `(H, W, C)` array `target`, cropping what does not fit."""
+    width, height, data = frame
+    if data is None:
+        return
+    image = np.frombuffer(data, np.uint8).reshape(height, width, -1)
+    h = min(height, target.shape[0])
+    w = min(width, target.shape[1])
+    c = min(image.shape[2], target.shape[2])
+    target[:h, :w, :c] = image[:h, :w, :c]
+    size[:] = (width, height)
+
+
+class BatchBuffer:
+    """
+    Preallocated shared memory batch of observations for `num_envs` instances, written in place by the
+    scripts inside the emulators (see `FrameSlot`), so the batch is never pickled, copied or stacked.
+
+    There are two buffers: while the learner reads `frames[t % 2]`, the instances fill the other one.
+    A returned batch stays valid until the step after the next one.
+    """
+
+    def __init__(self, num_envs: int, height: int, width: int, channels=4):
+        self.num_envs = num_envs
+        self.height = height
+        self.width = width
+        self.channels = channels
+        self.shm = shm.create(nbytes(num_envs, height, width, channels))
+        for name, array in views(self.shm.buf, num_envs, height, width, channels).items():
+            setattr(self, name, array)
+
+    def spec(self, index: int) -> dict:
+        """What the script of instance `index` needs to attach its `FrameSlot`."""
+        return {
+            "name": self.shm.name,
+            "index": index,
+            "num_envs": self.num_envs,
+            "height": self.height,
+            "width": self.width,
+            "channels": self.channels,
+        }
+
+    def close(self):
+        # Views have to go before the mapping can be closed.
+        self.frames = self.frame_count = self.skipped_frames = self.sizes = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class FrameSlot:
+    """Script-side writer of one instance's row in a client's `BatchBuffer`."""
+
+    def __init__(self, spec: dict):
+        self.index = spec["index"]
+        self.shm = shm.attach(spec["name"])
+        arrays = views(self.shm.buf, spec["num_envs"], spec["height"], spec["width"], spec["channels"])
+        self.frames = arrays["frames"][:, self.index]
+        self.frame_count = arrays["frame_count"][:, self.index]
+        self.skipped_frames = arrays["skipped_frames"][:, self.index]
+        self.sizes = arrays["sizes"][:, self.index]
+
+    def write(self, buffer_index: int, frame: tuple[int, int, bytes], step_info: dict):
+        write_frame(self.frames[buffer_index], self.sizes[buffer_index], frame)
+        self.frame_count[buffer_index] = step_info["frame_count"]
+        self.skipped_frames[buffer_index] = step_info["skipped_frames"]
+
+    def close(self):
+        self.frames = self.frame_count = self.skipped_frames = self.sizes = None
+        self.shm.close()
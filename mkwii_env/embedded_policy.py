@@ -0,0 +1,182 @@
+import time
+
+import numpy as np
+
+from enums import MemoryTypes
+from actions import GCAction, GCInputs
+from game_memory import RACE_INFO_POINTERS, RACE_STAGE_OFFSET, RACE_STAGE_FINISHED, follow
+
+STICK_INPUTS = ("StickX", "StickY", "CStickX", "CStickY")
+TRIGGER_INPUTS = ("TriggerLeft", "TriggerRight")
+
+
+def mlp(
+    observation: list[tuple],
+    weights: list[np.ndarray],
+    biases: list[np.ndarray],
+    outputs: list[str],
+    activation="tanh",
+    offset=None,
+    scale=None,
+) -> dict:
+    """
+    Serializable spec of a small MLP policy run inside the emulator by `PolicyExecutor`.
+
+    Args:
+        observation (list): `(address, MemoryTypes)` reads forming the input vector. `address` is an int or a pointer chain `(base, offset, ..., offset)`: the u32 at `base` is followed through every offset but the last, which is added to the final pointer.
+        weights (list[np.ndarray]): One `(inputs, outputs)` matrix per layer.
+        biases (list[np.ndarray]): One vector per layer.
+        outputs (list[str]): The GCInputs key driven by each output unit. Buttons are pressed when the unit is > 0, sticks are clipped to [-1, 1] and triggers to [0, 1].
+        activation (str): "tanh" or "relu", applied between layers.
+        offset, scale (np.ndarray, optional): Input normalization, `(x - offset) * scale`.
+    """
+    assert activation in ("tanh", "relu")
+    assert len(weights) == len(biases) and weights[-1].shape[1] == len(outputs)
+    return {
+        "kind": "mlp",
+        "observation": list(observation),
+        "weights": [np.asarray(w, np.float32) for w in weights],
+        "biases": [np.asarray(b, np.float32) for b in biases],
+        "outputs": list(outputs),
+        "activation": activation,
+        "offset": None if offset is None else np.asarray(offset, np.float32),
+        "scale": None if scale is None else np.asarray(scale, np.float32),
+    }
+
+
+def lookup(observation: list[tuple], bins: list[np.ndarray], table: np.ndarray, actions: list[GCInputs]) -> dict:
+    """
+    Serializable spec of a precomputed action table: each input is bucketed with `np.digitize` on its
+    `bins`, and `table[bucket_0, bucket_1, ...]` is the index of the action in `actions`.
+
+    Args:
+        observation (list): Reads forming the input vector, as for `mlp`.
+        bins (list[np.ndarray]): Bin edges per input.
+        table (np.ndarray): Action indices, shape `(len(bins[0]) + 1, len(bins[1]) + 1, ...)`.
+        actions (list[GCInputs]): The actions the table refers to.
+    """
+    table = np.asarray(table)
+    assert table.shape == tuple(len(edges) + 1 for edges in bins)
+    return {
+        "kind": "lookup",
+        "observation": list(observation),
+        "bins": [np.asarray(edges, np.float64) for edges in bins],
+        "table": table,
+        "actions": [dict(inputs) for inputs in actions],
+    }
+
+
+def race_finished(region="RMCE") -> tuple:
+    """`done` read ending an episode once the race is over."""
+    return (RACE_INFO_POINTERS[region], RACE_STAGE_OFFSET), MemoryTypes.u32, (RACE_STAGE_FINISHED,)
+
+
+def read(manager, address, memory_type: MemoryTypes) -> int | float:
+    """`manager.get_memory` that also follows pointer chains (see `game_memory.follow`). A broken chain reads as 0."""
+    pointer = follow(manager, address)
+    return 0 if pointer is None else manager.get_memory(pointer, memory_type)
+
+
+class PolicyExecutor:
+    """Script-side forward pass of an `mlp` or `lookup` spec, from RAM reads to a `{0: GCAction}`."""
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.observation = spec["observation"]
+        self.kind = spec["kind"]
+        if self.kind == "lookup":
+            self.actions = []
+            for inputs in spec["actions"]:
+                action = GCAction()
+                action.copyfromGCInputs(inputs)
+                self.actions.append(action)
+
+    def features(self, manager) -> np.ndarray:
+        return np.array([read(manager, address, memory_type) for address, memory_type in self.observation], np.float32)
+
+    def act(self, x: np.ndarray) -> dict[int, GCAction]:
+        spec = self.spec
+        if self.kind == "lookup":
+            index = tuple(int(np.digitize(value, edges)) for value, edges in zip(x, spec["bins"]))
+            return {0: self.actions[int(spec["table"][index])]}
+
+        h = x
+        if spec["offset"] is not None:
+            h = h - spec["offset"]
+        if spec["scale"] is not None:
+            h = h * spec["scale"]
+        last = len(spec["weights"]) - 1
+        for i, (w, b) in enumerate(zip(spec["weights"], spec["biases"])):
+            h = h @ w + b
+            if i < last:
+                h = np.tanh(h) if spec["activation"] == "tanh" else np.maximum(h, 0)
+        action = GCAction()
+        for key, value in zip(spec["outputs"], h.tolist()):
+            if key in STICK_INPUTS:
+                action[key] = min(max(value, -1.0), 1.0)
+            elif key in TRIGGER_INPUTS:
+                action[key] = min(max(value, 0.0), 1.0)
+            else:
+                action[key] = value > 0
+        return {0: action}
+
+
+async def evaluate(
+    manager,
+    policy: dict,
+    episodes=1,
+    max_frames=60 * 60 * 5,
+    start_state: bytes | None = None,
+    done=(),
+    summary=None,
+    sample_every=0,
+) -> dict:
+    """
+    Roll `policy` out for `episodes` episodes inside the emulator, each starting from `start_state`
+    (the current state when None) and lasting until a `done` read matches or `max_frames` pass. The
+    emulator is put back in `start_state` afterwards, so an evaluation leaves no trace.
+
+    Args:
+        done (list): `(address, MemoryTypes, values)` reads ending the episode when the value is in `values`.
+        summary (dict): `{name: (address, MemoryTypes)}` read at the end of every episode.
+        sample_every (int): Keep every n-th frame of each episode (0: none).
+
+    Returns:
+        {"episodes": [per-episode summary], "samples": [(episode, frame, (width, height, data))], "fps"}
+    """
+    executor = PolicyExecutor(policy)
+    if start_state is None:
+        start_state = manager.save_state()
+    results = []
+    samples = []
+    frames_total = 0
+    start = time.time()
+    for episode in range(episodes):
+        manager.load_state(start_state)
+        episode_start = time.time()
+        finished = False
+        frame = 0
+        while frame < max_frames:
+            action = executor.act(executor.features(manager))
+            manager.set_action(action)
+            await manager.step()
+            frame += 1
+            if sample_every and frame % sample_every == 0:
+                samples.append((episode, frame, manager.get_frame()))
+            if any(read(manager, address, memory_type) in values for address, memory_type, values in done):
+                finished = True
+                break
+        frames_total += frame
+        results.append(
+            {
+                "frames": frame,
+                "done": finished,
+                "time": time.time() - episode_start,
+                "summary": {
+                    name: read(manager, address, memory_type) for name, (address, memory_type) in (summary or {}).items()
+                },
+            }
+        )
+    fps = frames_total / max(time.time() - start, 1e-9)
+    manager.load_state(start_state)
+    return {"episodes": results, "samples": samples, "fps": fps}
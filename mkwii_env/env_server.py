@@ -0,0 +1,146 @@
+import argparse
+import os
+import socket
+import socketserver
+import threading
+
+import yaml
+
+from mkwii_env import MKWiiEnv
+from vec_env import MKWiiVecEnv
+from remote import HANDSHAKE_TIMEOUT, authenticate_client, load_secret, parse_address, send_message, recv_message
+
+
+class EnvServer:
+    """
+    Serves local `MKWiiEnv` instances to `RemoteMKWiiEnv` clients over TCP or a Unix socket.
+
+    Each connection attaches to one `DOLPHIN_ID` and then sends `(method, args, kwargs)` requests,
+    answered in order with `("ok", value)` or `("error", exception)`. Requests are handled one at a
+    time per connection; a pipelining client overlaps network latency by sending its next request
+    before the previous reply arrives, the request waits in the socket buffer meanwhile.
+
+    Messages are pickles, so a connection must first pass an HMAC handshake on the shared `secret`
+    (see `remote.authenticate_client`); connections that fail it are dropped before anything is
+    unpickled. The default address only accepts local connections.
+
+    Args:
+        dolphin_configs (list[dict]): `Dolphin` keyword arguments of the served instances.
+        address (str): "tcp://host:port" or "unix:///path" to listen on.
+        secret (str | bytes, optional): Secret shared with the clients, defaults to `MKWII_ENV_SECRET`.
+    """
+
+    METHODS = {
+        "step",
+        "get_obs",
+        "get_frame",
+        "get_state",
+        "set_wiimote_pointer",
+        "enable_fast_forward",
+        "disable_fast_forward",
+        "enable_rewind",
+        "disable_rewind",
+        "rewind",
+        "get_stats",
+        "set_state_paths",
+        "evaluate_policy",
+        "reload",
+        "profile_start",
+        "profile_stop",
+        "reset",
+        "disconnect_pipe",
+    }
+
+    def __init__(self, dolphin_configs: list[dict], address="tcp://127.0.0.1:5555", secret=None):
+        self.address = address
+        self.secret = load_secret(secret)
+        self.envs = {dolphin_config["DOLPHIN_ID"]: MKWiiEnv(dolphin_config=dolphin_config) for dolphin_config in dolphin_configs}
+        self.locks = {dolphin_id: threading.Lock() for dolphin_id in self.envs}
+
+        family, sockaddr = parse_address(address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(sockaddr):
+                os.remove(sockaddr)
+            server_class = socketserver.ThreadingUnixStreamServer
+        else:
+            server_class = socketserver.ThreadingTCPServer
+        server_class.allow_reuse_address = True
+        server_class.daemon_threads = True
+        self.server = server_class(sockaddr, self.handler())
+
+    @classmethod
+    def from_config(cls, config_path="dolphin_config.yaml", address="tcp://127.0.0.1:5555", secret=None):
+        """Serve the `DOLPHIN_IDS` of `dolphin_config.yaml`; the secret may also come from its `SERVER_SECRET`."""
+        config = yaml.safe_load(open(config_path, "r"))
+        return cls(
+            [MKWiiVecEnv.dolphin_config(config, dolphin_id) for dolphin_id in config["DOLPHIN_IDS"]],
+            address,
+            config.get("SERVER_SECRET") if secret is None else secret,
+        )
+
+    def handler(self):
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                if self.request.family == socket.AF_INET:
+                    self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.request.settimeout(HANDSHAKE_TIMEOUT)
+                try:
+                    if not authenticate_client(self.request, server.secret):
+                        return
+                except (ConnectionError, OSError):
+                    return
+                self.request.settimeout(None)
+                hello = recv_message(self.request)
+                compress = hello.get("compress", False)
+                env = server.envs.get(hello["DOLPHIN_ID"])
+                if env is None:
+                    send_message(self.request, ("error", KeyError(f"No Dolphin {hello['DOLPHIN_ID']} on this server")))
+                    return
+                send_message(self.request, ("ok", env.observation_space))
+                # This thread drives the instance from now on.
+                env.dolphin.LAUNCH.pin_client()
+
+                lock = server.locks[hello["DOLPHIN_ID"]]
+                while True:
+                    try:
+                        method, args, kwargs = recv_message(self.request)
+                    except ConnectionError:
+                        return
+                    if method not in server.METHODS:
+                        send_message(self.request, ("error", ValueError(f"Invalid method: {method}")))
+                        continue
+                    try:
+                        with lock:
+                            reply = ("ok", getattr(env, method)(*args, **kwargs))
+                    except Exception as e:
+                        reply = ("error", e)
+                    send_message(self.request, reply, compress)
+
+        return Handler
+
+    def serve_forever(self):
+        print(f"Serving {sorted(self.envs)} on {self.address}")
+        self.server.serve_forever()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        for env in self.envs.values():
+            env.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve local Dolphin instances to RemoteMKWiiEnv clients.")
+    parser.add_argument("--config", default="dolphin_config.yaml")
+    parser.add_argument(
+        "--address", default="tcp://127.0.0.1:5555", help='"tcp://host:port" or "unix:///path", e.g. tcp://0.0.0.0:5555 to serve other nodes'
+    )
+    args = parser.parse_args()
+
+    env_server = EnvServer.from_config(args.config, args.address)
+    try:
+        env_server.serve_forever()
+    finally:
+        env_server.close()
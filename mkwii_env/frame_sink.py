@@ -0,0 +1,141 @@
+import collections
+import os
+import threading
+
+from PIL import Image
+
+
+class FrameSink:
+    """
+    Encodes frames off the step loop, on a bounded pool of worker threads.
+
+    Frames are queued by reference: the `bytes` returned by the emulator are immutable, so the queue
+    only holds another reference and nothing is copied until the encoder reads it (PIL wraps it with
+    `frombuffer`, raw frames are written straight from it). zlib and libjpeg release the GIL, so
+    encoding overlaps stepping.
+
+    Args:
+        directory (str): Where frames are written.
+        format (str | callable): "png", "jpeg", "raw", or `encoder(frame, index)` for custom sinks (e.g. a video writer).
+        workers (int): Encoding threads.
+        max_pending (int): Queue bound.
+        policy (str): What `submit` does when the queue is full: "block" (backpressure), "drop_newest" or "drop_oldest".
+        png_compress_level (int): zlib level for PNG, low values trade size for speed.
+        jpeg_quality (int): Quality for JPEG.
+    """
+
+    POLICIES = ("block", "drop_newest", "drop_oldest")
+    EXTENSIONS = {"png": "png", "jpeg": "jpg", "raw": "rgba"}
+
+    def __init__(
+        self,
+        directory: str,
+        format="png",
+        workers=2,
+        max_pending=64,
+        policy="block",
+        png_compress_level=1,
+        jpeg_quality=90,
+    ):
+        assert policy in FrameSink.POLICIES
+        assert callable(format) or format in FrameSink.EXTENSIONS
+        self.directory = directory
+        self.format = format
+        self.max_pending = max_pending
+        self.policy = policy
+        self.png_compress_level = png_compress_level
+        self.jpeg_quality = jpeg_quality
+        os.makedirs(directory, exist_ok=True)
+
+        self.queue = collections.deque()
+        self.condition = threading.Condition()
+        self.in_progress = 0
+        self.closed = False
+        self.written = 0
+        self.dropped = 0
+        self.errors = []
+
+        self.workers = [threading.Thread(target=self.work, daemon=True) for _ in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, frame: tuple[int, int, bytes], index: int) -> bool:
+        """Queue `(width, height, data)` for encoding. Returns False if the frame was dropped."""
+        with self.condition:
+            if self.closed:
+                raise ValueError("FrameSink is closed")
+            if len(self.queue) >= self.max_pending:
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    return False
+                if self.policy == "drop_oldest":
+                    self.queue.popleft()
+                    self.dropped += 1
+                else:
+                    self.condition.wait_for(lambda: len(self.queue) < self.max_pending)
+            self.queue.append((frame, index))
+            self.condition.notify_all()
+        return True
+
+    def work(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.queue or self.closed)
+                if not self.queue:
+                    return
+                frame, index = self.queue.popleft()
+                self.in_progress += 1
+                self.condition.notify_all()
+            try:
+                self.encode(frame, index)
+                error = None
+            except Exception as e:
+                error = e
+            with self.condition:
+                self.in_progress -= 1
+                if error is None:
+                    self.written += 1
+                else:
+                    self.errors.append((index, error))
+                self.condition.notify_all()
+
+    def encode(self, frame: tuple[int, int, bytes], index: int):
+        if callable(self.format):
+            self.format(frame, index)
+            return
+        width, height, data = frame
+        path = os.path.join(self.directory, f"frame_{index:08d}.{FrameSink.EXTENSIONS[self.format]}")
+        if self.format == "raw":
+            with open(path, "wb") as f:
+                f.write(memoryview(data))
+            return
+        image = Image.frombuffer("RGBA", (width, height), data, "raw", "RGBA", 0, 1)
+        if self.format == "png":
+            image.save(path, "PNG", compress_level=self.png_compress_level)
+        else:
+            image.convert("RGB").save(path, "JPEG", quality=self.jpeg_quality)
+
+    @property
+    def failed(self) -> int:
+        """Frames whose encoding raised; `errors` holds their `(index, exception)`."""
+        return len(self.errors)
+
+    def flush(self):
+        """Wait until every queued frame has been written."""
+        with self.condition:
+            self.condition.wait_for(lambda: not self.queue and self.in_progress == 0)
+
+    def close(self):
+        """Flush, then stop the workers. Frames submitted before `close` are always written."""
+        self.flush()
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        for worker in self.workers:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,182 @@
+import pickle
+import time
+
+import numpy as np
+
+import shm
+from pipe_manager import PipeClosedError
+from batch_buffer import packed_size, packed_views, write_frame
+
+
+MAX_ACTION_BYTES = 4096
+
+
+def layout(height: int, width: int, channels: int) -> list[tuple[str, tuple, type]]:
+    """
+    Arrays of a free-running session, back to back (64-byte aligned) in one shared memory segment.
+    Both the action latch and the frame slot are seqlocks: the writer makes the sequence counter odd,
+    writes, then makes it even again, and a reader retries if the counter changed or was odd.
+    """
+    return [
+        ("stop", (1,), np.int64),
+        # Written by the client.
+        ("action_seq", (1,), np.int64),
+        ("action_size", (1,), np.int64),
+        ("action", (MAX_ACTION_BYTES,), np.uint8),
+        # Written by the script.
+        ("frame_seq", (1,), np.int64),
+        ("frame_count", (1,), np.int64),
+        ("applied_action", (1,), np.int64),  # number of the action in effect when the frame was drawn
+        ("action_frame", (1,), np.int64),  # frame on which that action was first applied
+        ("sizes", (2,), np.int32),
+        ("frame", (height, width, channels), np.uint8),
+    ]
+
+
+class FreeRunBuffer:
+    """
+    Client side of the free-running mode: the emulator draws frames continuously, applying whatever
+    action was published last, and publishes every frame to a latest-frame slot.
+
+    `publish(action)` never waits for the emulator and `latest()` returns the newest frame with the
+    sequence counters needed to measure lag: how many frames were drawn since the previous `latest()`
+    and how long the newest action took to be applied.
+
+    `is_alive` (e.g. `Dolphin.is_running`) is checked while `latest()` waits, which raises
+    `PipeClosedError` once the emulator has exited, like the pipe calls do.
+    """
+
+    SPIN_INTERVAL = 0.0001
+    ALIVE_INTERVAL = 0.1
+
+    def __init__(self, height: int, width: int, channels=4, is_alive=None):
+        self.height = height
+        self.width = width
+        self.channels = channels
+        self.is_alive = is_alive
+        arrays_layout = layout(height, width, channels)
+        self.shm = shm.create(packed_size(arrays_layout))
+        self.arrays = packed_views(self.shm.buf, arrays_layout)
+        self.published = 0
+        self.last_frame_seq = 0
+        self.publish_times = {}
+
+    def spec(self) -> dict:
+        return {"name": self.shm.name, "height": self.height, "width": self.width, "channels": self.channels}
+
+    def publish(self, action) -> int:
+        """Latch `action` (a controller dict) for every following frame. Returns its number."""
+        payload = pickle.dumps(action)
+        if len(payload) > MAX_ACTION_BYTES:
+            raise ValueError(f"Pickled action is {len(payload)} bytes, the latch holds {MAX_ACTION_BYTES}")
+        seq = self.arrays["action_seq"]
+        seq[0] += 1
+        self.arrays["action_size"][0] = len(payload)
+        self.arrays["action"][: len(payload)] = np.frombuffer(payload, np.uint8)
+        seq[0] += 1
+        self.published += 1
+        self.publish_times[self.published] = time.monotonic()
+        return self.published
+
+    def latest(self, wait=False, timeout=None):
+        """
+        Copy of the newest frame and its counters. With `wait`, block until a frame newer than the one
+        returned last time is published (or `timeout` passes, returning None). Raises
+        `PipeClosedError` if the emulator exits while waiting.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        next_check = time.monotonic() + self.ALIVE_INTERVAL
+        arrays = self.arrays
+        while True:
+            seq = int(arrays["frame_seq"][0])
+            if seq % 2 == 0 and (not wait or seq // 2 > self.last_frame_seq):
+                frame = arrays["frame"].copy()
+                width, height = arrays["sizes"]
+                frame_count = int(arrays["frame_count"][0])
+                applied_action = int(arrays["applied_action"][0])
+                action_frame = int(arrays["action_frame"][0])
+                if int(arrays["frame_seq"][0]) == seq:
+                    break
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return None
+            if self.is_alive is not None and now >= next_check:
+                if not self.is_alive():
+                    raise PipeClosedError("Dolphin exited while free-running")
+                next_check = now + self.ALIVE_INTERVAL
+            time.sleep(self.SPIN_INTERVAL)
+
+        frame_seq = seq // 2
+        info = {
+            "frame_count": frame_count,
+            "frame_seq": frame_seq,
+            # Frames drawn since the previous `latest()` that were never seen.
+            "missed_frames": max(0, frame_seq - self.last_frame_seq - 1),
+            "applied_action": applied_action,
+            # Published actions the emulator has not picked up yet.
+            "pending_actions": self.published - applied_action,
+            # Frames drawn since the action in effect was first applied.
+            "frames_since_action": frame_count - action_frame,
+        }
+        publish_time = self.publish_times.get(applied_action)
+        if publish_time is not None:
+            info["action_age"] = time.monotonic() - publish_time
+        for number in [n for n in self.publish_times if n < applied_action]:
+            del self.publish_times[number]
+        self.last_frame_seq = frame_seq
+        return (int(width), int(height), frame), info
+
+    def stop(self):
+        self.arrays["stop"][0] = 1
+
+    def close(self):
+        self.arrays = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class FreeRunSlot:
+    """Script-side end of a client's `FreeRunBuffer`."""
+
+    def __init__(self, spec: dict):
+        self.shm = shm.attach(spec["name"])
+        self.arrays = packed_views(self.shm.buf, layout(spec["height"], spec["width"], spec["channels"]))
+        self.action_seq = 0
+        self.applied_action = 0
+        self.action_frame = 0
+
+    def stopped(self) -> bool:
+        return bool(self.arrays["stop"][0])
+
+    def read_action(self, frame_count: int):
+        """
+        The newest published action if it changed since the last call, else None. `frame_count` is
+        the number of frames drawn so far; the action applies from the next one.
+        """
+        arrays = self.arrays
+        seq = int(arrays["action_seq"][0])
+        if seq % 2 or seq == self.action_seq:
+            return None
+        size = int(arrays["action_size"][0])
+        payload = arrays["action"][:size].tobytes()
+        if int(arrays["action_seq"][0]) != seq:
+            # Torn read, the next frame picks it up.
+            return None
+        self.action_seq = seq
+        self.applied_action = seq // 2
+        self.action_frame = frame_count + 1
+        return pickle.loads(payload)
+
+    def write(self, frame: tuple[int, int, bytes], frame_count: int):
+        arrays = self.arrays
+        seq = arrays["frame_seq"]
+        seq[0] += 1
+        write_frame(arrays["frame"], arrays["sizes"], frame)
+        arrays["frame_count"][0] = frame_count
+        arrays["applied_action"][0] = self.applied_action
+        arrays["action_frame"][0] = self.action_frame
+        seq[0] += 1
+
+    def close(self):
+        self.arrays = None
+        self.shm.close()
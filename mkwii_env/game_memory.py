@@ -0,0 +1,65 @@
+# Addresses and layout of the game's memory, shared by the client and the script inside Dolphin.
+
+from enums import MemoryTypes
+
+
+# Address of the `Raceinfo` instance pointer (Raceinfo::spInstance) per disc region. The race stage
+# is the u32 at +0x28: 0 intro camera, 1 countdown, 2 racing, 3 finished.
+RACE_INFO_POINTERS = {
+    "RMCE": 0x809B8F70,  # USA
+    "RMCP": 0x809BD730,  # PAL
+    "RMCJ": 0x809BC790,  # Japan
+    "RMCK": 0x809ABD70,  # Korea
+}
+RACE_STAGE_OFFSET = 0x28
+RACE_STAGE_RACING = 2
+RACE_STAGE_FINISHED = 3
+
+# Emulated Wii memory, as seen through `memory.read_*`: `{name: (address, size)}`.
+REGIONS = {
+    "MEM1": (0x80000000, 0x1800000),
+    "MEM2": (0x90000000, 0x4000000),
+}
+
+# `struct` format of each `MemoryTypes`, the console is big-endian.
+FORMATS = {
+    MemoryTypes.u8: ">B",
+    MemoryTypes.u16: ">H",
+    MemoryTypes.u32: ">I",
+    MemoryTypes.u64: ">Q",
+    MemoryTypes.s8: ">b",
+    MemoryTypes.s16: ">h",
+    MemoryTypes.s32: ">i",
+    MemoryTypes.s64: ">q",
+    MemoryTypes.f32: ">f",
+    MemoryTypes.f64: ">d",
+}
+
+
+def is_pointer(value: int) -> bool:
+    """Whether `value` points into MEM1 or MEM2. Pointer chains are only followed through such values."""
+    return any(address <= value < address + size for address, size in REGIONS.values())
+
+
+def follow(manager, chain, pointers: dict | None = None) -> int | None:
+    """
+    Address a pointer chain leads to, None if it is broken (a pointer outside MEM1/MEM2).
+
+    Args:
+        chain: An int (a fixed address) or `(base, offset, ..., offset)`: the u32 at `base` is followed through every offset but the last, which is added to the final pointer.
+        pointers (dict, optional): `{address: u32}` of the pointers already read, shared between calls so chains with a common prefix read it once.
+    """
+    if isinstance(chain, int):
+        return chain
+    pointer = chain[0]
+    for offset in chain[1:]:
+        if pointers is None:
+            value = manager.get_memory(pointer, MemoryTypes.u32)
+        elif pointer in pointers:
+            value = pointers[pointer]
+        else:
+            value = pointers[pointer] = manager.get_memory(pointer, MemoryTypes.u32)
+        if not is_pointer(value):
+            return None
+        pointer = value + offset
+    return pointer
@@ -0,0 +1,326 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from actions import GCAction, WiiClassicAction
+from enums import Character, Controllers, Track, Vehicles
+
+
+# Course slot IDs used by ghost files (and the game's course archives), which are not the menu order
+# of `Track`.
+COURSE_IDS = [
+    Track.MarioCircuit,
+    Track.MooMooMeadows,
+    Track.MushroomGorge,
+    Track.GrumbleVolcano,
+    Track.ToadsFactory,
+    Track.CoconutMall,
+    Track.DKSummitDKSnowboardCross,
+    Track.WariosGoldMine,
+    Track.LuigiCircuit,
+    Track.DaisyCircuit,
+    Track.MoonviewHighway,
+    Track.MapleTreeway,
+    Track.BowsersCastle,
+    Track.RainbowRoad,
+    Track.DryDryRuins,
+    Track.KoopaCape,
+    Track.GCNPeachBeach,
+    Track.GCNMarioCircuit,
+    Track.GCNWaluigiStadium,
+    Track.GCNDKMountain,
+    Track.DSYoshiFalls,
+    Track.DSDesertHills,
+    Track.DSPeachGardens,
+    Track.DSDelfinoSquare,
+    Track.SNESMarioCircuit3,
+    Track.SNESGhostValley2,
+    Track.N64MarioRaceway,
+    Track.N64SherbetLand,
+    Track.N64BowsersCastle,
+    Track.N64DKsJungleParkway,
+    Track.GBABowserCastle3,
+    Track.GBAShyGuyBeach,
+]
+
+# Controller the ghost was driven with, as stored in the header.
+GHOST_CONTROLLERS = ("WiiWheel", "WiimoteNunchuk", "Classic", "GameCube")
+
+# Face button flags of the input stream.
+ACCELERATE = 0x01
+BRAKE = 0x02
+ITEM = 0x04
+DRIFT = 0x08
+
+# Trick (D-pad) codes of the input stream.
+TRICKS = (None, "Up", "Down", "Left", "Right")
+
+# Stick values are 0..14 per axis, 7 being neutral.
+STICK_NEUTRAL = 7
+
+# Face flag -> button, the default layout of both the GameCube and the Classic controller.
+BUTTONS = {ACCELERATE: "A", BRAKE: "B", ITEM: "L", DRIFT: "R"}
+
+HEADER_SIZE = 0x88
+
+
+class GhostError(ValueError):
+    """Raised for files that are not valid ghosts."""
+
+
+def bits(data: bytes, offset: int, start: int, length: int) -> int:
+    """`length` bits starting `start` bits into the big-endian bytes at `offset`."""
+    size = (start + length + 7) // 8
+    value = int.from_bytes(data[offset : offset + size], "big")
+    return (value >> (size * 8 - start - length)) & ((1 << length) - 1)
+
+
+def decode_time(data: bytes, offset: int) -> float:
+    """Minutes (7 bits), seconds (7) and milliseconds (10) packed in 3 bytes, in seconds."""
+    return bits(data, offset, 0, 7) * 60 + bits(data, offset, 7, 7) + bits(data, offset, 14, 10) / 1000
+
+
+def yaz_decompress(data: bytes, offset: int = 0) -> bytes:
+    """Decompress a Yaz0/Yaz1 block (the LZ77 variant of Nintendo archives) starting at `offset`."""
+    if data[offset : offset + 3] != b"Yaz":
+        raise GhostError("Missing Yaz header")
+    size = struct.unpack_from(">I", data, offset + 4)[0]
+    out = bytearray(size)
+    src = offset + 16
+    dst = 0
+    while dst < size:
+        group = data[src]
+        src += 1
+        for bit in range(7, -1, -1):
+            if dst >= size:
+                break
+            if group >> bit & 1:
+                out[dst] = data[src]
+                src += 1
+                dst += 1
+                continue
+            high, low = data[src], data[src + 1]
+            src += 2
+            distance = ((high & 0x0F) << 8 | low) + 1
+            count = high >> 4
+            if count == 0:
+                count = data[src] + 0x12
+                src += 1
+            else:
+                count += 2
+            # Back-references may overlap the bytes they produce, so they are copied one by one.
+            for _ in range(count):
+                out[dst] = out[dst - distance]
+                dst += 1
+    return bytes(out)
+
+
+def run_lengths(data: bytes, offset: int, count: int) -> tuple[np.ndarray, np.ndarray]:
+    """`(values, frames)` of `count` 2-byte (value, frame count) run-length entries."""
+    entries = np.frombuffer(data, np.uint8, count * 2, offset).reshape(count, 2)
+    return entries[:, 0], entries[:, 1].astype(np.int64)
+
+
+def decode_inputs(data: bytes) -> dict[str, np.ndarray]:
+    """
+    Expand the run-length encoded input stream into per-frame arrays:
+    "buttons" (face flags, uint8), "stick" (`(frames, 2)` raw 0..14, uint8) and "trick" (`TRICKS`
+    index, uint8).
+    """
+    face_count, stick_count, trick_count = struct.unpack_from(">HHH", data, 0)
+    offset = 8
+    face, face_frames = run_lengths(data, offset, face_count)
+    offset += face_count * 2
+    stick, stick_frames = run_lengths(data, offset, stick_count)
+    offset += stick_count * 2
+    tricks = np.frombuffer(data, np.uint8, trick_count * 2, offset).reshape(trick_count, 2)
+    trick = (tricks[:, 0] >> 4) & 0x07
+    trick_frames = (tricks[:, 0].astype(np.int64) & 0x0F) << 8 | tricks[:, 1]
+
+    frames = max(face_frames.sum(), stick_frames.sum(), trick_frames.sum())
+    arrays = {
+        "buttons": np.zeros(frames, np.uint8),
+        "stick": np.full((frames, 2), STICK_NEUTRAL, np.uint8),
+        "trick": np.zeros(frames, np.uint8),
+    }
+    for name, values, lengths in (("buttons", face, face_frames), ("trick", trick, trick_frames)):
+        expanded = np.repeat(values, lengths)
+        arrays[name][: len(expanded)] = expanded
+    expanded = np.repeat(stick, stick_frames)
+    arrays["stick"][: len(expanded), 0] = expanded >> 4
+    arrays["stick"][: len(expanded), 1] = expanded & 0x0F
+    return arrays
+
+
+class Ghost:
+    """
+    A decoded time-trial ghost (.rkg): the run's metadata, mapped onto the `Track`, `Character` and
+    `Vehicles` enums, and its inputs as per-frame arrays (see `decode_inputs`), which `gc_inputs`,
+    `classic_inputs` and `actions` turn into controller inputs.
+    """
+
+    def __init__(self, data: bytes, path: str | None = None):
+        if len(data) < HEADER_SIZE + 4 or data[:4] != b"RKGD":
+            raise GhostError(f"{path or 'data'} is not a ghost file")
+        self.path = path
+        self.finish_time = decode_time(data, 0x04)
+        course_id = bits(data, 0x07, 0, 6)
+        self.track = COURSE_IDS[course_id] if course_id < len(COURSE_IDS) else None
+        self.vehicle = Vehicles(bits(data, 0x08, 0, 6))
+        self.character = Character(bits(data, 0x08, 6, 6))
+        self.date = (2000 + bits(data, 0x08, 12, 7), bits(data, 0x08, 19, 4), bits(data, 0x08, 23, 5))
+        controller = bits(data, 0x08, 28, 4)
+        self.controller = GHOST_CONTROLLERS[controller] if controller < len(GHOST_CONTROLLERS) else None
+        compressed = bits(data, 0x0C, 4, 1)
+        self.ghost_type = bits(data, 0x0C, 7, 7)
+        self.automatic_drift = bool(bits(data, 0x0C, 14, 1))
+        laps = data[0x10]
+        self.lap_times = [decode_time(data, 0x11 + 3 * lap) for lap in range(min(laps, 5))]
+
+        if compressed:
+            self.inputs = decode_inputs(yaz_decompress(data, HEADER_SIZE + 4))
+        else:
+            self.inputs = decode_inputs(data[HEADER_SIZE:-4])
+
+    @classmethod
+    def load(cls, path: str) -> "Ghost":
+        with open(path, "rb") as ghost_file:
+            return cls(ghost_file.read(), path)
+
+    @property
+    def frames(self) -> int:
+        return len(self.inputs["buttons"])
+
+    def metadata(self) -> dict:
+        return {
+            "path": self.path,
+            "track": None if self.track is None else self.track.name,
+            "character": self.character.name,
+            "vehicle": self.vehicle.name,
+            "controller": self.controller,
+            "automatic_drift": self.automatic_drift,
+            "finish_time": self.finish_time,
+            "lap_times": self.lap_times,
+            "date": self.date,
+            "frames": self.frames,
+        }
+
+    def gc_inputs(self, start=0, stop=None) -> dict[str, np.ndarray]:
+        return gc_inputs(slice_inputs(self.inputs, start, stop))
+
+    def classic_inputs(self, start=0, stop=None) -> dict[str, np.ndarray]:
+        return classic_inputs(slice_inputs(self.inputs, start, stop))
+
+    def actions(self, controller=Controllers.GCAction, start=0, stop=None) -> list[dict]:
+        """One `{0: action}` per frame, ready for `MKWiiEnv.step`."""
+        return actions(slice_inputs(self.inputs, start, stop), controller)
+
+
+def slice_inputs(inputs: dict[str, np.ndarray], start=0, stop=None) -> dict[str, np.ndarray]:
+    return {name: array[start:stop] for name, array in inputs.items()}
+
+
+def controller_inputs(inputs: dict[str, np.ndarray], stick: tuple[str, str]) -> dict[str, np.ndarray]:
+    """Per-frame arrays keyed like the controller's inputs TypedDict."""
+    result = {button: (inputs["buttons"] & flag) != 0 for flag, button in BUTTONS.items()}
+    stick_values = (inputs["stick"].astype(np.float32) - STICK_NEUTRAL) / STICK_NEUTRAL
+    result[stick[0]] = stick_values[:, 0]
+    result[stick[1]] = stick_values[:, 1]
+    for code, button in enumerate(TRICKS):
+        if button is not None:
+            result[button] = inputs["trick"] == code
+    return result
+
+
+def gc_inputs(inputs: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """`GCInputs` keys (A, B, L, R, StickX, StickY, D-pad) to per-frame arrays."""
+    return controller_inputs(inputs, ("StickX", "StickY"))
+
+
+def classic_inputs(inputs: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """`WiiClassicInputs` keys (A, B, L, R, LeftStickX, LeftStickY, D-pad) to per-frame arrays."""
+    return controller_inputs(inputs, ("LeftStickX", "LeftStickY"))
+
+
+def actions(inputs: dict[str, np.ndarray], controller=Controllers.GCAction) -> list[dict]:
+    if controller == Controllers.GCAction:
+        arrays, action_type = gc_inputs(inputs), GCAction
+    elif controller == Controllers.WiiClassicAction:
+        arrays, action_type = classic_inputs(inputs), WiiClassicAction
+    else:
+        raise ValueError(f"Ghost inputs map onto GCAction or WiiClassicAction, not {controller}")
+    columns = {key: array.tolist() for key, array in arrays.items()}
+    result = []
+    for frame in range(len(inputs["buttons"])):
+        action = action_type()
+        for key, values in columns.items():
+            action[key] = values[frame]
+        result.append({0: action})
+    return result
+
+
+def decode_files(paths: list[str], output_dir: str, errors: list | None = None) -> "GhostDataset":
+    """
+    Decode many ghosts into disk-backed arrays in `output_dir`: every ghost's frames back to back in
+    `buttons.npy`, `stick.npy` and `trick.npy` (memory-mapped `.npy` files, so collections larger than
+    memory decode and load fine), and `index.json` with each ghost's metadata and frame range.
+    The files are decoded twice, once to size the arrays and once to fill them, so only one ghost is
+    held in memory at a time. Files that fail to decode are skipped and appended to `errors`.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    index = []
+    total = 0
+    for path in paths:
+        try:
+            ghost = Ghost.load(path)
+        except (GhostError, ValueError, IndexError, struct.error) as e:
+            if errors is not None:
+                errors.append((path, str(e)))
+            continue
+        index.append({**ghost.metadata(), "start": total})
+        total += ghost.frames
+
+    arrays = {
+        "buttons": np.lib.format.open_memmap(os.path.join(output_dir, "buttons.npy"), "w+", np.uint8, (total,)),
+        "stick": np.lib.format.open_memmap(os.path.join(output_dir, "stick.npy"), "w+", np.uint8, (total, 2)),
+        "trick": np.lib.format.open_memmap(os.path.join(output_dir, "trick.npy"), "w+", np.uint8, (total,)),
+    }
+    for entry in index:
+        ghost = Ghost.load(entry["path"])
+        for name, array in arrays.items():
+            array[entry["start"] : entry["start"] + entry["frames"]] = ghost.inputs[name]
+    for array in arrays.values():
+        array.flush()
+    with open(os.path.join(output_dir, "index.json"), "w") as index_file:
+        json.dump(index, index_file)
+    return GhostDataset(output_dir)
+
+
+class GhostDataset:
+    """Ghosts decoded by `decode_files`, read through memory maps."""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "index.json")) as index_file:
+            self.index = json.load(index_file)
+        self.arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in ("buttons", "stick", "trick")
+        }
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def inputs(self, i: int) -> dict[str, np.ndarray]:
+        entry = self.index[i]
+        return slice_inputs(self.arrays, entry["start"], entry["start"] + entry["frames"])
+
+    def select(self, track: Track | None = None, character: Character | None = None, vehicle: Vehicles | None = None) -> list[int]:
+        """Indices of the ghosts driven on `track` with `character` and `vehicle` (None matches any)."""
+        return [
+            i
+            for i, entry in enumerate(self.index)
+            if (track is None or entry["track"] == track.name)
+            and (character is None or entry["character"] == character.name)
+            and (vehicle is None or entry["vehicle"] == vehicle.name)
+        ]
@@ -0,0 +1,119 @@
+import os
+import shutil
+
+from user_config import write_user_config
+
+
+class LaunchProfile:
+    """
+    How one Dolphin instance is placed on the host.
+
+    Args:
+        CPUS (list[int], optional): Cores the emulator is pinned to. Defaults to NUMA_NODE's cores, or no pinning.
+        NUMA_NODE (int, optional): NUMA node whose cores (and, with `numactl`, memory) the emulator uses.
+        CLIENT_CPUS (list[int], optional): Cores for the client worker driving this instance, see `pin_client`.
+        NICE (int): Niceness increment applied to the emulator.
+        CPU_THREAD (bool): Dolphin's dual core mode, running the GPU thread apart from the CPU thread.
+        GPU_THREADS (int, optional): Shader compiler threads. Defaults to Dolphin's automatic choice.
+        BACKEND_MULTITHREADING (bool): Let the video backend submit work from its own thread.
+        USER_PATH (str, optional): Parent of the isolated per-`DOLPHIN_ID` user directories.
+        CONFIG_PROFILE (str, optional): `user_config.PROFILES` entry written into the user directory.
+        OBSERVATION_SIZE (list[int]): Width and height of the frames the profile renders.
+    """
+
+    def __init__(
+        self,
+        CPUS=None,
+        NUMA_NODE=None,
+        CLIENT_CPUS=None,
+        NICE=0,
+        CPU_THREAD=True,
+        GPU_THREADS=None,
+        BACKEND_MULTITHREADING=False,
+        USER_PATH=None,
+        CONFIG_PROFILE=None,
+        OBSERVATION_SIZE=(640, 348),
+    ):
+        self.CPUS = CPUS
+        self.NUMA_NODE = NUMA_NODE
+        self.CLIENT_CPUS = CLIENT_CPUS
+        self.NICE = NICE
+        self.CPU_THREAD = CPU_THREAD
+        self.GPU_THREADS = GPU_THREADS
+        self.BACKEND_MULTITHREADING = BACKEND_MULTITHREADING
+        self.USER_PATH = USER_PATH
+        self.CONFIG_PROFILE = CONFIG_PROFILE
+        self.OBSERVATION_SIZE = OBSERVATION_SIZE
+
+    @classmethod
+    def from_config(cls, config: dict, DOLPHIN_ID):
+        """
+        Build the profile of `DOLPHIN_ID` from a loaded `dolphin_config.yaml`: the `LAUNCH` defaults,
+        overridden by the instance's entry under `INSTANCES`.
+        """
+        profile = dict(config.get("LAUNCH") or {})
+        profile.update((config.get("INSTANCES") or {}).get(DOLPHIN_ID) or {})
+        return cls(**profile)
+
+    def cpus(self) -> set[int] | None:
+        if self.CPUS is not None:
+            return set(self.CPUS)
+        if self.NUMA_NODE is not None:
+            return numa_node_cpus(self.NUMA_NODE)
+        return None
+
+    def user_dir(self, DOLPHIN_ID) -> str | None:
+        if self.USER_PATH is None:
+            return None
+        return os.path.join(self.USER_PATH, str(DOLPHIN_ID))
+
+    def command(self, DOLPHIN_PATH, SCRIPT_PATH, ISO_PATH, DOLPHIN_ID) -> list[str]:
+        command = [f"{DOLPHIN_PATH}/dolphin-emu"]
+        user_dir = self.user_dir(DOLPHIN_ID)
+        if user_dir is not None:
+            os.makedirs(user_dir, exist_ok=True)
+            if self.CONFIG_PROFILE is not None:
+                write_user_config(user_dir, self.CONFIG_PROFILE, *self.OBSERVATION_SIZE)
+            command.append(f"--user={user_dir}")
+        elif self.CONFIG_PROFILE is not None:
+            raise ValueError("CONFIG_PROFILE needs USER_PATH, the host's global Dolphin config is never rewritten")
+        command += ["-C", f"Dolphin.Core.CPUThread={self.CPU_THREAD}"]
+        command += ["-C", f"GFX.Settings.BackendMultithreading={self.BACKEND_MULTITHREADING}"]
+        if self.GPU_THREADS is not None:
+            command += ["-C", f"GFX.Settings.NumberCompilerThreads={self.GPU_THREADS}"]
+            command += ["-C", f"GFX.Settings.NumberPrecompilerThreads={self.GPU_THREADS}"]
+        command += ["--script", SCRIPT_PATH, ISO_PATH]
+
+        if self.NUMA_NODE is not None and shutil.which("numactl") is not None:
+            command = ["numactl", f"--membind={self.NUMA_NODE}"] + command
+        return command
+
+    def preexec(self):
+        """Runs in the forked child before `exec`, so every emulator thread inherits the placement."""
+        cpus = self.cpus()
+        if cpus:
+            os.sched_setaffinity(0, cpus)
+        if self.NICE:
+            os.nice(self.NICE)
+
+    def pin_client(self):
+        """
+        Pin the calling thread, the worker driving this instance, to `CLIENT_CPUS` (on Linux the
+        affinity of pid 0 is the calling thread's). `EnvServer` calls it from each connection's thread.
+        """
+        if self.CLIENT_CPUS:
+            os.sched_setaffinity(0, set(self.CLIENT_CPUS))
+
+
+def numa_node_cpus(node: int) -> set[int]:
+    """Cores of a NUMA node, parsed from sysfs (e.g. "0-7,16-23")."""
+    with open(f"/sys/devices/system/node/node{node}/cpulist", "r") as f:
+        cpulist = f.read().strip()
+    cpus = set()
+    for part in cpulist.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.update(range(int(first), int(last) + 1))
+        elif part:
+            cpus.add(int(part))
+    return cpus
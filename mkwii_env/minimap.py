@@ -0,0 +1,167 @@
+import os
+
+import numpy as np
+
+from enums import MemoryTypes, Track
+
+
+RACER_FIELDS = ("x", "z", "forward_x", "forward_z")
+ITEM_FIELDS = ("x", "z")
+
+# Channels of a `Minimap` observation.
+CHANNELS = ("course", "player", "racers", "racer_cos", "racer_sin", "items")
+
+
+def minimap_paths(racers: list[dict], items: list[dict] = ()) -> dict:
+    """
+    `PointerCache` paths of the positions a `Minimap` draws, all f32.
+
+    Args:
+        racers (list[dict]): Per racer, the player first: `{"x", "z", "forward_x", "forward_z": chain}`, the ground-plane position and facing direction.
+        items (list[dict]): Per item object slot: `{"x", "z": chain}`.
+    """
+    paths = {}
+    for i, racer in enumerate(racers):
+        for field in RACER_FIELDS:
+            paths[f"racer{i}_{field}"] = (racer[field], MemoryTypes.f32)
+    for i, item in enumerate(items):
+        for field in ITEM_FIELDS:
+            paths[f"item{i}_{field}"] = (item[field], MemoryTypes.f32)
+    return paths
+
+
+class CourseMap:
+    """
+    Top-down occupancy grid of one `Track`: which world cells karts have driven on, cached on disk as
+    `<cache_dir>/<track name>.npz` and grown with `record`, normally from ghost replays driven by
+    `MKWiiEnv.record_course_map`, until it covers the course.
+
+    Args:
+        track (Track): The course.
+        cache_dir (str): Where the maps are stored.
+        cell_size (float): World units per cell.
+        extent (float): The map covers `[-extent, extent)` on both axes.
+        radius (int): Cells marked around each recorded position, about half the road width.
+    """
+
+    def __init__(self, track: Track, cache_dir="course_maps", cell_size=64.0, extent=32768.0, radius=8):
+        self.track = track
+        self.path = os.path.join(cache_dir, f"{track.name}.npz")
+        self.radius = radius
+        if os.path.exists(self.path):
+            cached = np.load(self.path)
+            self.grid = cached["grid"]
+            self.cell_size = float(cached["cell_size"])
+            self.extent = float(cached["extent"])
+        else:
+            self.cell_size = cell_size
+            self.extent = extent
+            cells = int(np.ceil(2 * extent / cell_size))
+            self.grid = np.zeros((cells, cells), np.uint8)
+        offsets = np.arange(-radius, radius + 1)
+        dz, dx = np.meshgrid(offsets, offsets, indexing="ij")
+        disk = dx**2 + dz**2 <= radius**2
+        self.disk = np.stack([dz[disk], dx[disk]], axis=1)
+        self.dirty = False
+
+    def cells(self, xz: np.ndarray) -> np.ndarray:
+        """`(..., 2)` world `(x, z)` to `(..., 2)` integer `(row, col)`."""
+        return np.floor((xz[..., ::-1] + self.extent) / self.cell_size).astype(np.int64)
+
+    def record(self, xz: np.ndarray):
+        """Mark the cells around the `(n, 2)` world positions `xz` (NaN rows are ignored) as course."""
+        xz = np.asarray(xz, np.float64).reshape(-1, 2)
+        xz = xz[~np.isnan(xz).any(axis=1)]
+        cells = (self.cells(xz)[:, None, :] + self.disk[None]).reshape(-1, 2)
+        inside = ((cells >= 0) & (cells < len(self.grid))).all(axis=1)
+        rows, cols = cells[inside].T
+        self.grid[rows, cols] = 255
+        self.dirty = self.dirty or bool(inside.any())
+
+    def sample(self, xz: np.ndarray) -> np.ndarray:
+        """Occupancy at the `(..., 2)` world positions `xz`, 0 outside the map."""
+        cells = self.cells(xz)
+        inside = ((cells >= 0) & (cells < len(self.grid))).all(axis=-1)
+        cells = np.where(inside[..., None], cells, 0)
+        return np.where(inside, self.grid[cells[..., 0], cells[..., 1]], 0).astype(np.uint8)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        np.savez_compressed(self.path, grid=self.grid, cell_size=self.cell_size, extent=self.extent)
+        self.dirty = False
+
+
+class Minimap:
+    """
+    Small egocentric top-down raster of the race, built from RAM reads instead of the rendered frame:
+    a `(len(CHANNELS), size, size)` uint8 grid centred on the player, facing up, holding the course
+    map, the player, the other racers (with their heading relative to the player as cos and sin, 0-255)
+    and item objects. At 32x32 that is 6 KB per step instead of a 900 KB RGBA frame.
+
+    Args:
+        course_map (CourseMap): Occupancy of the current track.
+        racers (int): Racer slots read, the player first.
+        items (int): Item object slots read.
+        size (int): Grid side, in cells.
+        cell_size (float): World units per grid cell.
+        record (bool): Add the racers' positions to `course_map` on every render. Off by default, as the map would learn the agent's own mistakes; build it from replays instead.
+    """
+
+    def __init__(self, course_map: CourseMap, racers: int, items=0, size=32, cell_size=256.0, record=False):
+        self.course_map = course_map
+        self.racers = racers
+        self.items = items
+        self.size = size
+        self.cell_size = cell_size
+        self.record = record
+        self.racer_names = [[f"racer{i}_{field}" for field in RACER_FIELDS] for i in range(racers)]
+        self.item_names = [[f"item{i}_{field}" for field in ITEM_FIELDS] for i in range(items)]
+        # Ego-frame (forward, right) offsets of every cell centre, row 0 being the farthest ahead.
+        centres = (np.arange(size) - size / 2 + 0.5) * cell_size
+        self.cell_forward, self.cell_right = np.meshgrid(-centres, centres, indexing="ij")
+
+    @staticmethod
+    def values(state: dict, names: list[list[str]]) -> np.ndarray:
+        """`(len(names), fields)` array of the state values, NaN where a chain is broken."""
+        return np.array([[np.nan if state[name] is None else state[name] for name in row] for row in names], np.float64)
+
+    def cells(self, forward: np.ndarray, right: np.ndarray):
+        rows = np.floor(self.size / 2 - forward / self.cell_size).astype(np.int64)
+        cols = np.floor(self.size / 2 + right / self.cell_size).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.size) & (cols >= 0) & (cols < self.size)
+        return rows[inside], cols[inside], inside
+
+    def render(self, state: dict) -> np.ndarray:
+        grid = np.zeros((len(CHANNELS), self.size, self.size), np.uint8)
+        racers = self.values(state, self.racer_names).reshape(-1, len(RACER_FIELDS))
+        if self.record:
+            self.course_map.record(racers[:, :2])
+        player = racers[0]
+        if np.isnan(player).any():
+            return grid
+        heading = player[2:] / max(np.hypot(*player[2:]), 1e-6)
+        right_axis = np.array([-heading[1], heading[0]])
+
+        # Course map under every cell.
+        world = (
+            player[:2]
+            + self.cell_forward[..., None] * heading
+            + self.cell_right[..., None] * right_axis
+        )
+        grid[0] = self.course_map.sample(world)
+
+        grid[1, self.size // 2, self.size // 2] = 255
+        others = racers[1:][~np.isnan(racers[1:]).any(axis=1)]
+        relative = others[:, :2] - player[:2]
+        rows, cols, inside = self.cells(relative @ heading, relative @ right_axis)
+        facing = others[inside, 2:] / np.maximum(np.hypot(others[inside, 2], others[inside, 3]), 1e-6)[:, None]
+        grid[2, rows, cols] = 255
+        grid[3, rows, cols] = np.round((facing @ heading + 1) * 127.5).astype(np.uint8)
+        grid[4, rows, cols] = np.round((facing @ right_axis + 1) * 127.5).astype(np.uint8)
+
+        if self.items:
+            items = self.values(state, self.item_names)
+            relative = items[~np.isnan(items).any(axis=1)] - player[:2]
+            rows, cols, _ = self.cells(relative @ heading, relative @ right_axis)
+            grid[5, rows, cols] = 255
+        return grid
@@ -1,177 +1,934 @@
-import os
-import signal
-import subprocess
-import pickle
-import json
-
-import enum
-import sys
-
-from actions import GCAction, WiiClassicAction, WiimoteAction, WiiNunchukAction, GBAAction
-from enums import Commands
-from pipe_manager import PipeManager
-
-import gym
-from gym.spaces import Box, Discrete, Tuple
-
-
-class Dolphin:
-    def __init__(
-        self,
-        DOLPHIN_PATH="/root/dolphin/build/Binaries",
-        DOLPHIN_ID=0,
-        SCRIPT_PATH="/root/mkwii_env/dolphin_scripts/dolphin_script.py",
-        ISO_PATH="/root/Mario Kart Wii (USA) (En,Fr,Es).wbfs",
-        PIPE_PATH="/root/mkwii_env/Pipes",
-    ):
-        self.DOLPHIN_PATH = DOLPHIN_PATH
-        self.DOLPHIN_ID = DOLPHIN_ID
-        self.SCRIPT_PATH = SCRIPT_PATH,
-        self.ISO_PATH = ISO_PATH
-        self.PIPE_PATH = PIPE_PATH
-
-        self.pipes = PipeManager(PIPE_PATH, DOLPHIN_ID)
-
-        self.dolphin = None
-        self.connect()
-
-    def connect(self):
-        if self.dolphin is None:
-            self.dolphin = subprocess.Popen(
-                f'"{self.DOLPHIN_PATH}/dolphin-emu" --script "{self.SCRIPT_PATH}" "{self.ISO_PATH}"',
-                stdin=subprocess.PIPE,
-                shell=True,
-                text=True,
-                # input=json.dumps([self.PIPE_PATH, self.DOLPHIN_ID]).encode(),
-            )
-            self.dolphin.stdin.write(json.dumps([self.PIPE_PATH, self.DOLPHIN_ID]) + "\n")
-            self.dolphin.stdin.flush()
-        else:
-            print("Dolphin is already running.")
-
-    def mkfifo(self, path):
-        if not os.path.exists(os.path.dirname(path)):
-            os.makedirs(os.path.dirname(path))
-        try:
-            os.mkfifo(path)
-        except OSError as e:
-            print(e)
-            os.remove(path)
-            os.mkfifo(path)
-
-    def step(
-        self,
-        action: (
-            dict[int, GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction]
-            | GCAction
-            | WiiClassicAction
-            | WiimoteAction
-            | WiiNunchukAction
-            | GBAAction
-        ),
-    ):
-        """
-        Args:
-            action (dict[int, GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction] | GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction): The action to be performed by the emulator.
-        """
-        if not isinstance(action, dict):
-            action = {0: action}
-        for controller_id, action in action.items():
-            action.__module__ = "actions"
-        self.pipes.send_command(Commands.DO_ACTION)
-        self.pipes.send_data(action)
-        state = self.pipes.get_data()
-
-        return state
-
-    def set_wiimote_pointer(self, controller_id: int, x: float, y: float):
-        self.pipes.send_command(Commands.SET_WIIMOTE_POINTER)
-        self.pipes.send_data((controller_id, x, y))
-
-    def get_frame(self) -> tuple[int, int, bytes]:
-        self.pipes.send_command(Commands.GET_FRAME)
-        (width, height, data) = self.pipes.get_data()
-
-        return width, height, data
-
-    def get_state(self):
-        self.pipes.send_command(Commands.GET_STATE)
-        state = self.pipes.get_data()
-
-        return state
-
-    def disconnect_pipe(self):
-        self.pipes.send_command(Commands.END)
-
-    def reset(self):
-        self.kill()
-        self.connect()
-
-    def kill(self):
-        if self.dolphin.poll() is None:
-            os.killpg(os.getpgid(self.dolphin.pid), signal.SIGKILL)
-            self.dolphin = None
-
-
-class MKWiiEnv(gym.Env):
-    def __init__(
-        self,
-        dolphin_config={
-            "DOLPHIN_PATH": "/root/dolphin/build/Binaries",
-            "DOLPHIN_ID": 0,
-            "SCRIPT_PATH": "/root/mkwii_env/dolphin_scripts/dolphin_script.py",
-            "ISO_PATH": "/root/Mario Kart Wii (USA) (En,Fr,Es).wbfs",
-            "PIPE_PATH": "/root/mkwii_env/Pipes",
-        },
-    ):
-        self.dolphin = Dolphin(**dolphin_config)
-        self.n = 0
-        self.observation_space = Tuple(
-            [
-                Box(low=0, high=255, shape=(640, 348, 4), dtype=int),  # image RGBA
-                Box(low=0, high=1, shape=(1,), dtype=float),
-            ]
-        )
-
-    def step(
-        self,
-        action: (
-            dict[int, GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction]
-            | GCAction
-            | WiiClassicAction
-            | WiimoteAction
-            | WiiNunchukAction
-            | GBAAction
-        ) = GCAction(),
-    ):
-        """
-        Args:
-            action (GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction, optional): The action to be performed by the emulator. Defaults to GCAction().
-        """
-        return self.dolphin.step(action), 0, False, {}
-
-    def set_wiimote_pointer(self, controller_id: int, x: float, y: float):
-        self.dolphin.set_wiimote_pointer(controller_id, x, y)
-
-    def get_obs(self):
-        return (self.dolphin.get_frame(), self.dolphin.get_state())
-
-    def get_frame(self):
-        return self.dolphin.get_frame()
-
-    def get_state(self):
-        return self.dolphin.get_state()
-
-    def reset(self):
-        return self.dolphin.reset()
-
-    def disconnect_pipe(self):
-        self.dolphin.disconnect_pipe()
-
-    def close(self):
-        self.dolphin.kill()
-        super().close()
-
-    @enum.unique
-    class MacroFlags(enum.Flag):
-        NONE = 0
+import asyncio
+import os
+import signal
+import subprocess
+import pickle
+import json
+import math
+import select
+import time
+
+import enum
+import sys
+
+from actions import GCAction, WiiClassicAction, WiimoteAction, WiiNunchukAction, GBAAction
+from enums import Commands, PROTOCOL_VERSION, Track
+from pipe_manager import NO_DATA, PendingRequest, PipeManager, PipeTimeoutError, PipeClosedError, ProtocolError
+from launch import LaunchProfile
+from savestate import Savestate
+from free_run import FreeRunBuffer
+from ram_snapshot import RamObservation
+from minimap import CHANNELS, CourseMap, Minimap, minimap_paths
+
+import gym
+import numpy as np
+from gym.spaces import Box, Discrete, Tuple
+
+
+def action_dict(action) -> dict:
+    """`{controller_id: action}` as the script unpickles it."""
+    if not isinstance(action, dict):
+        action = {0: action}
+    for controller_id, controller_action in action.items():
+        controller_action.__module__ = "actions"
+    return action
+
+
+def step_request(action, buffer_index: int | None = None) -> tuple[Commands, object]:
+    """The command and data of a step, as sent over the pipes by `Dolphin.send_step`."""
+    action = action_dict(action)
+    if buffer_index is None:
+        return Commands.DO_ACTION, action
+    return Commands.DO_ACTION_INTO_BUFFER, (action, buffer_index)
+
+
+class Dolphin:
+    """
+    One `dolphin-emu` process running `dolphin_script.py`, driven through a `PipeManager`.
+
+    Every pipe call is bounded by `TIMEOUT` seconds (`BOOT_TIMEOUT` while waiting for the script to
+    come up) and aborts early when the process exits, so a crashed or hung emulator raises
+    `PipeTimeoutError`/`PipeClosedError` instead of blocking the caller forever. `restart()` brings a
+    failed instance back; `restart(wait=False)` returns right after the launch and leaves the boot to
+    `poll_ready`, so a pool of instances keeps stepping while one of them boots.
+
+    `LAUNCH` is a `LaunchProfile` (or its keyword dict) controlling core pinning, niceness, emulator
+    thread options and the isolated per-`DOLPHIN_ID` user directory.
+
+    `RAM_OBSERVATION` declares RAM ranges copied into shared memory after every step, as
+    `{name: (address, size, dtype)}`; each step's info then holds `info["ram"]`, `{name: typed view}`
+    (see `RamObservation`).
+
+    The `a*` coroutines (`astep`, `areset`, `aget_state`, ...) do the same over non-blocking pipe I/O,
+    so many instances can be awaited concurrently from one event loop. They are serialized per
+    instance by `lock`; do not mix them with blocking calls on the same instance.
+    """
+
+    def __init__(
+        self,
+        DOLPHIN_PATH="/root/dolphin/build/Binaries",
+        DOLPHIN_ID=0,
+        SCRIPT_PATH="/root/mkwii_env/dolphin_scripts/dolphin_script.py",
+        ISO_PATH="/root/Mario Kart Wii (USA) (En,Fr,Es).wbfs",
+        PIPE_PATH="/root/mkwii_env/Pipes",
+        TIMEOUT=30.0,
+        BOOT_TIMEOUT=180.0,
+        LAUNCH=None,
+        RAM_OBSERVATION=None,
+    ):
+        self.DOLPHIN_PATH = DOLPHIN_PATH
+        self.DOLPHIN_ID = DOLPHIN_ID
+        self.SCRIPT_PATH = SCRIPT_PATH
+        self.ISO_PATH = ISO_PATH
+        self.PIPE_PATH = PIPE_PATH
+        self.TIMEOUT = TIMEOUT
+        self.BOOT_TIMEOUT = BOOT_TIMEOUT
+        if LAUNCH is None or isinstance(LAUNCH, dict):
+            LAUNCH = LaunchProfile(**(LAUNCH or {}))
+        self.LAUNCH = LAUNCH
+
+        self.pipes = PipeManager(PIPE_PATH, DOLPHIN_ID, timeout=TIMEOUT, is_alive=self.is_running)
+
+        self.dolphin = None
+        self.restarts = 0
+        self.boot = None  # heartbeat of a boot started by `restart(wait=False)`
+        self.boot_deadline = None
+        # Script-side settings, re-sent after a restart: {Commands.SET_*: data}
+        self.script_config = {}
+        self.lock = asyncio.Lock()
+        self.ram_observation = None
+        if RAM_OBSERVATION is not None:
+            self.ram_observation = RamObservation(RAM_OBSERVATION)
+            self.script_config[Commands.SET_RAM_OBSERVATION] = self.ram_observation.spec()
+        self.connect()
+
+    def connect(self):
+        """Launch the emulator, wait for the script and send it the settings made so far."""
+        self.launch()
+        self.wait_ready()
+        for command, data in self.script_config.items():
+            self.configure(command, data)
+
+    def launch(self):
+        if self.dolphin is None:
+            self.dolphin = subprocess.Popen(
+                self.LAUNCH.command(self.DOLPHIN_PATH, self.SCRIPT_PATH, self.ISO_PATH, self.DOLPHIN_ID),
+                stdin=subprocess.PIPE,
+                text=True,
+                preexec_fn=self.LAUNCH.preexec,
+                # Own process group, so `kill` takes down the emulator and not this process.
+                start_new_session=True,
+                # input=json.dumps([self.PIPE_PATH, self.DOLPHIN_ID]).encode(),
+            )
+            self.dolphin.stdin.write(json.dumps([self.PIPE_PATH, self.DOLPHIN_ID]) + "\n")
+            self.dolphin.stdin.flush()
+        else:
+            print("Dolphin is already running.")
+
+    async def aconnect(self):
+        self.launch()
+        await self.arequest(Commands.HEARTBEAT, timeout=self.BOOT_TIMEOUT)
+        for command, data in self.script_config.items():
+            await self.arequest(command, data)
+
+    def wait_ready(self):
+        """Block until the script inside the emulator answers a heartbeat, or `BOOT_TIMEOUT` passes."""
+        return self.heartbeat(timeout=self.BOOT_TIMEOUT)
+
+    def is_running(self) -> bool:
+        return self.dolphin is not None and self.dolphin.poll() is None
+
+    def heartbeat(self, timeout=None) -> int:
+        """Round trip through the script. Returns the number of frames it has drawn so far."""
+        self.pipes.send_command(Commands.HEARTBEAT, timeout=timeout)
+        return self.pipes.get_data(timeout=timeout)
+
+    def is_alive(self, timeout=None) -> bool:
+        """Liveness check: the process is running and the script answers a heartbeat in time."""
+        if not self.is_running():
+            return False
+        try:
+            self.heartbeat(timeout=timeout)
+        except (PipeTimeoutError, PipeClosedError):
+            return False
+        return True
+
+    def restart(self, wait=True):
+        """
+        Kill the instance, recreate its FIFOs so no stale message survives, and launch it again. With
+        `wait=False`, return without waiting for the script: `poll_ready` completes the boot.
+        """
+        self.kill()
+        self.pipes = PipeManager(self.PIPE_PATH, self.DOLPHIN_ID, timeout=self.TIMEOUT, is_alive=self.is_running)
+        self.restarts += 1
+        if wait:
+            self.connect()
+            return
+        self.launch()
+        self.boot = PendingRequest(self.pipes, Commands.HEARTBEAT)
+        self.boot_deadline = time.monotonic() + self.BOOT_TIMEOUT
+
+    def poll_ready(self) -> bool:
+        """
+        Make progress on a boot started by `restart(wait=False)` without blocking. Returns True once
+        the script has answered and got its settings back (always, outside of a boot). Raises
+        `PipeClosedError`/`PipeTimeoutError` if the emulator exits or `BOOT_TIMEOUT` passes first.
+        """
+        if self.boot is None:
+            return True
+        if not self.is_running():
+            self.end_boot()
+            raise PipeClosedError(f"Dolphin {self.DOLPHIN_ID} exited while booting")
+        reader = self.boot.reader
+        if self.boot.try_write() and select.select([reader], [], [], 0)[0] and reader.on_readable():
+            self.end_boot()
+            for command, data in self.script_config.items():
+                self.configure(command, data)
+            return True
+        if time.monotonic() > self.boot_deadline:
+            self.end_boot()
+            raise PipeTimeoutError(f"Dolphin {self.DOLPHIN_ID} did not boot within {self.BOOT_TIMEOUT} s")
+        return False
+
+    def finish_boot(self):
+        """Block until a boot started by `restart(wait=False)` completes."""
+        while not self.poll_ready():
+            time.sleep(0.01)
+
+    def end_boot(self):
+        if self.boot is not None:
+            self.boot.close()
+            self.boot = None
+
+    async def arestart(self):
+        self.kill()
+        self.pipes = PipeManager(self.PIPE_PATH, self.DOLPHIN_ID, timeout=self.TIMEOUT, is_alive=self.is_running)
+        self.restarts += 1
+        await self.aconnect()
+
+    async def arequest(self, command: Commands, data=NO_DATA, timeout=None):
+        """Send `command` (and `data`) and await the reply, see `PipeManager.arequest`."""
+        async with self.lock:
+            return await self.pipes.arequest(command, data, timeout)
+
+    def configure(self, command: Commands, data):
+        """Send a script setting (a `Commands.SET_*` command) and remember it for restarts."""
+        self.pipes.send_command(command)
+        self.pipes.send_data(data)
+        self.script_config[command] = data
+
+    def mkfifo(self, path):
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        try:
+            os.mkfifo(path)
+        except OSError as e:
+            print(e)
+            os.remove(path)
+            os.mkfifo(path)
+
+    def step(
+        self,
+        action: (
+            dict[int, GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction]
+            | GCAction
+            | WiiClassicAction
+            | WiimoteAction
+            | WiiNunchukAction
+            | GBAAction
+        ),
+    ):
+        """
+        Args:
+            action (dict[int, GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction] | GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction): The action to be performed by the emulator.
+
+        Returns:
+            The frame drawn after the action (and after any fast-forwarded frames), and a dict with the
+            script's `frame_count` and the number of `skipped_frames`.
+        """
+        self.send_step(action)
+        (frame, step_info) = self.wait_step()
+
+        return frame, step_info
+
+    def send_step(self, action, buffer_index: int | None = None):
+        """
+        First half of `step`: hand the action to the script, which starts emulating right away. With
+        `buffer_index`, the frame is written into that buffer of the attached `BatchBuffer` instead of
+        being sent back.
+        """
+        command, data = step_request(action, buffer_index)
+        self.pipes.send_command(command)
+        self.pipes.send_data(data)
+
+    async def astep(self, action, buffer_index: int | None = None):
+        return self.attach_ram(await self.arequest(*step_request(action, buffer_index)))
+
+    def wait_step(self):
+        """Second half of `step`: `(frame, step_info)`, or only `step_info` for a buffered step."""
+        return self.attach_ram(self.pipes.get_data())
+
+    def attach_ram(self, reply):
+        """Replace the `ram_buffer` index of a step reply with the views of that `RamObservation` copy."""
+        step_info = reply[1] if isinstance(reply, tuple) else reply
+        if "ram_buffer" in step_info:
+            step_info["ram"] = self.ram_observation.views[step_info.pop("ram_buffer")]
+        return reply
+
+    def set_frame_buffer(self, spec: dict | None):
+        """Attach the script to its row of a `BatchBuffer` (see `BatchBuffer.spec`), or detach with None."""
+        self.configure(Commands.SET_FRAME_BUFFER, spec)
+
+    def evaluation_request(
+        self, policy: dict, start_state: Savestate | None = None, **evaluation
+    ) -> tuple[Commands, dict]:
+        """The command and data running `policy` inside the script, see `embedded_policy.evaluate`."""
+        start_state = None if start_state is None else (start_state.name, start_state.size)
+        return Commands.EVALUATE_POLICY, {"policy": policy, "start_state": start_state, **evaluation}
+
+    def evaluate_policy(self, policy: dict, start_state: Savestate | None = None, timeout=math.inf, **evaluation) -> dict:
+        """
+        Roll `policy` (an `embedded_policy.mlp` or `lookup` spec) out inside the emulator. Rollouts
+        can take long, so by default only the process exit aborts the wait.
+        """
+        command, data = self.evaluation_request(policy, start_state, **evaluation)
+        self.pipes.send_command(command)
+        self.pipes.send_data(data)
+        return self.pipes.get_data(timeout=timeout)
+
+    def read_ram(self, spec: dict) -> int:
+        """Bulk-copy RAM ranges into a `RamSnapshotBuffer` (see its `spec`). Returns the frame counter."""
+        self.pipes.send_command(Commands.READ_RAM)
+        self.pipes.send_data(spec)
+        return self.pipes.get_data()
+
+    def start_free_run(self, spec: dict):
+        """Let the script draw frames on its own into a `FreeRunBuffer` until its stop flag is raised."""
+        self.pipes.send_command(Commands.FREE_RUN)
+        self.pipes.send_data(spec)
+
+    def wait_free_run(self) -> dict:
+        """Summary sent by the script once it leaves free-running mode."""
+        return self.pipes.get_data()
+
+    def set_wiimote_pointer(self, controller_id: int, x: float, y: float):
+        self.pipes.send_command(Commands.SET_WIIMOTE_POINTER)
+        self.pipes.send_data((controller_id, x, y))
+
+    def get_frame(self) -> tuple[int, int, bytes]:
+        self.pipes.send_command(Commands.GET_FRAME)
+        (width, height, data) = self.pipes.get_data()
+
+        return width, height, data
+
+    def get_state(self):
+        self.pipes.send_command(Commands.GET_STATE)
+        state = self.pipes.get_data()
+
+        return state
+
+    async def aget_frame(self) -> tuple[int, int, bytes]:
+        return await self.arequest(Commands.GET_FRAME)
+
+    async def aget_state(self):
+        return await self.arequest(Commands.GET_STATE)
+
+    def set_fast_forward(self, fast_forward_config: dict | None):
+        """Enable fast-forwarding with `FastForward` keyword arguments, or disable it with None."""
+        self.configure(Commands.SET_FAST_FORWARD, fast_forward_config)
+
+    def set_state_paths(self, state_config: dict | None):
+        """
+        Declare what `get_state` returns with `PointerCache` keyword arguments (paths, region,
+        screen_id_address), or go back to None states with None. With `"every_step": True`, every step
+        info also holds the state as `step_info["state"]`.
+        """
+        self.configure(Commands.SET_STATE_PATHS, state_config)
+
+    def set_frame_output(self, enabled: bool):
+        """Whether `step` sends the frame back; without it the frame of a step reply is None."""
+        self.configure(Commands.SET_FRAME_OUTPUT, enabled)
+
+    def set_rewind(self, rewind_config: dict | None):
+        """
+        Enable the in-emulator rewind ring with `RewindBuffer` keyword arguments (interval, max_bytes,
+        keyframe_every, level), or disable it with None.
+        """
+        self.configure(Commands.SET_REWIND, rewind_config)
+
+    def rewind(self, n_frames: int) -> int | None:
+        """Go back `n_frames` frames. Returns the frame reached, or None if it is no longer buffered."""
+        self.pipes.send_command(Commands.REWIND)
+        self.pipes.send_data(n_frames)
+        return self.pipes.get_data()
+
+    def get_stats(self) -> dict:
+        """Script-side counters: frames drawn, commands handled and rewind ring memory use."""
+        self.pipes.send_command(Commands.GET_STATS)
+        return self.pipes.get_data()
+
+    def profile_start(self, n_steps: int):
+        """Profile the script's next `n_steps` commands inside the running emulator."""
+        self.pipes.send_command(Commands.PROFILE_START)
+        self.pipes.send_data(n_steps)
+
+    def profile_stop(self) -> dict | None:
+        """
+        Stop profiling (if the window is still open) and return the summary of the latest window:
+        the stats file path under `PIPE_PATH/<DOLPHIN_ID>/`, the number of steps, the total time and
+        the top functions by cumulative time.
+        """
+        self.pipes.send_command(Commands.PROFILE_STOP)
+        return self.pipes.get_data()
+
+    def snapshot(self) -> Savestate:
+        """Savestate the emulator into a shared memory segment owned by the returned handle."""
+        self.pipes.send_command(Commands.SAVE_STATE)
+        return Savestate(*self.pipes.get_data())
+
+    def send_restore(self, state: Savestate):
+        self.pipes.send_command(Commands.LOAD_STATE)
+        self.pipes.send_data((state.name, state.size, state.frame_count, state.frame))
+
+    def wait_restore(self) -> int:
+        return self.pipes.get_data()
+
+    def restore(self, state: Savestate) -> int:
+        """
+        Load `state` (from any instance running the same game). The script's frame counter and last
+        frame go back to the snapshot's; the frame counter is returned.
+        """
+        self.send_restore(state)
+        return self.wait_restore()
+
+    def send_reload(self, modules=()):
+        self.pipes.send_command(Commands.RELOAD)
+        self.pipes.send_data(list(modules))
+
+    def wait_reload(self) -> list[str]:
+        result = self.pipes.get_data()
+        if "error" in result:
+            raise ProtocolError(f"Dolphin {self.DOLPHIN_ID} did not reload:\n{result['error']}")
+        if result["protocol"] != PROTOCOL_VERSION:
+            raise ProtocolError(
+                f"Dolphin {self.DOLPHIN_ID} speaks protocol {result['protocol']}, this client {PROTOCOL_VERSION}"
+            )
+        return result["reloaded"]
+
+    def reload(self, modules=()) -> list[str]:
+        """
+        Re-import the script-side modules (`dolphin_manager`, `actions`, `enums`, ...) and `modules`
+        (e.g. reward code) inside the running emulator, keeping the pipes, savestates and emulator
+        state (see `mkwii_scripts/reload.py`). Raises `ProtocolError` if the new code speaks another
+        protocol version than the running script or this client, or fails to import. Returns the
+        reloaded module names.
+        """
+        self.send_reload(modules)
+        return self.wait_reload()
+
+    def disconnect_pipe(self):
+        self.pipes.send_command(Commands.END)
+
+    def reset(self):
+        self.kill()
+        self.connect()
+
+    async def areset(self):
+        self.kill()
+        await self.aconnect()
+
+    def close(self):
+        self.kill()
+        if self.ram_observation is not None:
+            self.ram_observation.close()
+            self.ram_observation = None
+
+    def kill(self):
+        self.end_boot()
+        if self.dolphin is None:
+            return
+        if self.dolphin.poll() is None:
+            os.killpg(os.getpgid(self.dolphin.pid), signal.SIGKILL)
+            self.dolphin.wait()
+        self.dolphin = None
+
+
+class MKWiiEnv(gym.Env):
+    def __init__(
+        self,
+        dolphin_config={
+            "DOLPHIN_PATH": "/root/dolphin/build/Binaries",
+            "DOLPHIN_ID": 0,
+            "SCRIPT_PATH": "/root/mkwii_env/dolphin_scripts/dolphin_script.py",
+            "ISO_PATH": "/root/Mario Kart Wii (USA) (En,Fr,Es).wbfs",
+            "PIPE_PATH": "/root/mkwii_env/Pipes",
+        },
+    ):
+        self.dolphin = Dolphin(**dolphin_config)
+        self.n = 0
+        self.obs = None
+        self.frame_sinks = []
+        self.pipelined = False
+        self.in_flight = False
+        self.pending = None  # result of the in-flight step, collected early by `drain`
+        self.free_run = None
+        self.minimap = None
+        self.observation_space = Tuple(
+            [
+                Box(low=0, high=255, shape=(640, 348, 4), dtype=int),  # image RGBA
+                Box(low=0, high=1, shape=(1,), dtype=float),
+            ]
+        )
+
+    def step(
+        self,
+        action: (
+            dict[int, GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction]
+            | GCAction
+            | WiiClassicAction
+            | WiimoteAction
+            | WiiNunchukAction
+            | GBAAction
+        ) = GCAction(),
+    ):
+        """
+        Args:
+            action (GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction, optional): The action to be performed by the emulator. Defaults to GCAction().
+
+        If the emulator crashes or misses its deadline, it is relaunched and the episode ends with
+        `info["TimeLimit.truncated"]` and `info["restarted"]` set, returning the last observation
+        received before the failure (None if the failure came before any observation). The call does
+        not wait for the new emulator to boot: until it has, `step` returns right away with that same
+        observation, reward 0, done False and `info["booting"]`, without applying the action. The
+        first step after the boot starts the new episode.
+
+        In pipelined mode (see `enable_pipelining`) the returned observation is the one produced by the
+        previous call's action.
+        """
+        if self.free_run is not None:
+            raise RuntimeError("The emulator is free-running, call stop_free_run() first")
+        if not self.ready():
+            return self.obs, 0, False, {"booting": True}
+        if self.pipelined:
+            return self.step_pipelined(action)
+        try:
+            self.obs, info = self.dolphin.step(action)
+        except (PipeTimeoutError, PipeClosedError) as e:
+            return self.failed(e)
+        return self.observe(info)
+
+    def ready(self) -> bool:
+        """Whether the emulator can take a step, i.e. is not booting after a restart (see `step`)."""
+        try:
+            return self.dolphin.poll_ready()
+        except (PipeTimeoutError, PipeClosedError) as e:
+            self.failed(e)
+            return False
+
+    def failed(self, error: Exception):
+        """Relaunch the emulator without waiting for it and end the episode, see `step`."""
+        print(f"Dolphin {self.dolphin.DOLPHIN_ID} failed ({error}), restarting.")
+        self.in_flight = False
+        self.pending = None
+        self.dolphin.restart(wait=False)
+        return self.obs, 0, True, {"TimeLimit.truncated": True, "restarted": True}
+
+    def step_pipelined(self, action):
+        try:
+            result = self.collect()
+            if result is None:
+                # Nothing in flight yet: answer with the frame `action` is applied to.
+                result = (self.refresh_obs(), 0, False, {})
+            self.dolphin.send_step(action)
+            self.in_flight = True
+        except (PipeTimeoutError, PipeClosedError) as e:
+            return self.failed(e)
+        return result
+
+    def enable_pipelining(self):
+        """
+        One-step-latency mode: `step(a_t)` sends `a_t` and returns right away with the observation
+        produced by `a_{t-1}`, so the emulator renders the next frame while the policy computes the
+        next action.
+
+        Timing: the call that sends `a_t` returns `o_t`, the frame drawn after `a_{t-1}` (the first
+        call returns the current frame). An action chosen from the returned observation is therefore
+        applied one step later than in serial mode: `a_{t+1}` is decided from `o_t` but acts on the
+        frame drawn after `a_t`. Every other call first waits for the step in flight; `restore`, `rewind`
+        and `reset` drop its result, so the next step starts a new pipeline.
+
+        Only `step` is pipelined; `astep` already overlaps instances through the event loop.
+        """
+        self.pipelined = True
+
+    def disable_pipelining(self):
+        """Leave pipelined mode. Returns the result of the step that was still in flight, or None."""
+        self.drain()
+        self.pipelined = False
+        result, self.pending = self.pending, None
+        return result
+
+    def collect(self):
+        """Result of the step in flight, if any."""
+        if self.pending is not None:
+            result, self.pending = self.pending, None
+            return result
+        if not self.in_flight:
+            return None
+        self.in_flight = False
+        self.obs, info = self.dolphin.wait_step()
+        return self.observe(info)
+
+    def drain(self):
+        """Finish the step in flight before another command, keeping its result for the next `step`."""
+        self.dolphin.finish_boot()
+        if self.in_flight:
+            self.pending = self.collect()
+
+    def discard(self):
+        """Finish the step in flight and drop its result, e.g. before jumping to another game state."""
+        self.drain()
+        self.pending = None
+
+    async def astep(self, action=GCAction()):
+        """
+        `step` as a coroutine, e.g. `await asyncio.gather(*(env.astep(a) for env, a in zip(envs, actions)))`.
+        A failed emulator is relaunched in the background as in `step`, so it never holds up the gather.
+        """
+        if self.pipelined:
+            raise RuntimeError("astep does not support pipelining")
+        if self.free_run is not None:
+            raise RuntimeError("The emulator is free-running, call stop_free_run() first")
+        if not self.ready():
+            return self.obs, 0, False, {"booting": True}
+        try:
+            self.obs, info = await self.dolphin.astep(action)
+        except (PipeTimeoutError, PipeClosedError) as e:
+            return self.failed(e)
+        return self.observe(info)
+
+    def observe(self, info: dict):
+        if self.minimap is not None:
+            self.obs = self.minimap.render(info.pop("state"))
+            self.n += 1
+            return self.obs, 0, False, info
+        for frame_sink in self.frame_sinks:
+            frame_sink.submit(self.obs, self.n)
+        self.n += 1
+        return self.obs, 0, False, info
+
+    def start_free_run(self, height=348, width=640, channels=4) -> FreeRunBuffer:
+        """
+        Real-time mode: the emulator keeps drawing frames without waiting for the client, applying the
+        most recent action given to `publish_action` (neutral until the first one), and publishes every
+        frame to a latest-frame slot read by `latest_obs`. Emulation speed is then bounded only by the
+        emulator itself (run it at 100% speed to evaluate under real-time conditions), and the info of
+        `latest_obs` tells how far the agent lags behind.
+
+        No other command can be sent until `stop_free_run`.
+        """
+        self.discard()
+        self.free_run = FreeRunBuffer(height, width, channels, is_alive=self.dolphin.is_running)
+        self.dolphin.start_free_run(self.free_run.spec())
+        return self.free_run
+
+    def publish_action(self, action) -> int:
+        """Latch `action` for every following frame. Returns its number, see `latest_obs`."""
+        return self.free_run.publish(action_dict(action))
+
+    def latest_obs(self, wait=True, timeout=None):
+        """
+        Newest `(width, height, frame)` (frame as an `(H, W, C)` array) and info with `frame_count`,
+        `missed_frames` (drawn but never returned), `applied_action` (number of the action in effect),
+        `pending_actions` (published but not applied yet), `frames_since_action` and `action_age`
+        (seconds since the applied action was published). With `wait`, blocks until a new frame;
+        raises `PipeClosedError` if the emulator exits meanwhile.
+        """
+        return self.free_run.latest(wait, timeout)
+
+    def stop_free_run(self) -> dict:
+        """Leave free-running mode. Returns the script's summary: frames drawn and actions applied."""
+        self.free_run.stop()
+        try:
+            return self.dolphin.wait_free_run()
+        finally:
+            self.close_free_run()
+
+    def close_free_run(self):
+        """Drop the free-running buffer without waiting for the script, e.g. before killing it."""
+        if self.free_run is not None:
+            self.free_run.close()
+            self.free_run = None
+
+    def evaluate_policy(
+        self,
+        policy: dict,
+        episodes=1,
+        max_frames=60 * 60 * 5,
+        start_state: Savestate | None = None,
+        done=(),
+        summary=None,
+        sample_every=0,
+        timeout=math.inf,
+    ) -> dict:
+        """
+        Evaluate a policy at emulator speed: the policy runs inside the emulator every frame and only
+        the episode summaries (and sampled frames) come back.
+
+        Args:
+            policy (dict): `embedded_policy.mlp(...)` or `embedded_policy.lookup(...)`.
+            episodes (int): Episodes to roll out, each from `start_state`.
+            max_frames (int): Frame limit per episode.
+            start_state (Savestate, optional): Where every episode starts, and where the emulator is left afterwards. Defaults to the current state.
+            done (list): `(address, MemoryTypes, values)` reads ending an episode, e.g. `[embedded_policy.race_finished()]`.
+            summary (dict): `{name: (address, MemoryTypes)}` read at the end of each episode.
+            sample_every (int): Also return every n-th frame of each episode (0: none).
+            timeout (float): Seconds to wait for the whole evaluation.
+
+        Returns:
+            {"episodes": [{"frames", "done", "time", "summary"}], "samples": [(episode, frame, obs)], "fps"}
+        """
+        self.discard()
+        return self.dolphin.evaluate_policy(
+            policy,
+            start_state,
+            timeout,
+            episodes=episodes,
+            max_frames=max_frames,
+            done=list(done),
+            summary=summary,
+            sample_every=sample_every,
+        )
+
+    def add_frame_sink(self, frame_sink):
+        """Hand every observed frame to `frame_sink` (a `FrameSink`), which encodes it off the step loop."""
+        self.frame_sinks.append(frame_sink)
+
+    def remove_frame_sink(self, frame_sink):
+        frame_sink.flush()
+        self.frame_sinks.remove(frame_sink)
+
+    def set_wiimote_pointer(self, controller_id: int, x: float, y: float):
+        self.drain()
+        self.dolphin.set_wiimote_pointer(controller_id, x, y)
+
+    def get_obs(self):
+        self.drain()
+        return (self.dolphin.get_frame(), self.dolphin.get_state())
+
+    def get_frame(self):
+        self.drain()
+        return self.dolphin.get_frame()
+
+    def get_state(self):
+        self.drain()
+        return self.dolphin.get_state()
+
+    async def aget_obs(self):
+        return (await self.dolphin.aget_frame(), await self.dolphin.aget_state())
+
+    async def aget_frame(self):
+        return await self.dolphin.aget_frame()
+
+    async def aget_state(self):
+        return await self.dolphin.aget_state()
+
+    def read_ram(self, spec: dict) -> int:
+        """See `Dolphin.read_ram`; `ram_scanner.RamScanner` searches RAM with it."""
+        self.drain()
+        return self.dolphin.read_ram(spec)
+
+    def reload(self, modules=()) -> list[str]:
+        """Hot-reload the script-side code, see `Dolphin.reload`."""
+        self.drain()
+        return self.dolphin.reload(modules)
+
+    def snapshot(self) -> Savestate:
+        """
+        Capture the current game state, e.g. to branch several rollouts from one in-race frame.
+        Call `release()` on the handle once it is no longer needed.
+        """
+        self.drain()
+        return self.dolphin.snapshot()
+
+    def restore(self, state: Savestate) -> int:
+        """
+        Return to `state`; the next `step` continues from the snapshotted frame. The observation is
+        refreshed to that frame. Returns the frame counter, back to the snapshot's.
+        """
+        self.discard()
+        frame_count = self.dolphin.restore(state)
+        self.refresh_obs()
+        return frame_count
+
+    def refresh_obs(self):
+        """Fetch the observation of the current frame, e.g. after a restore, without stepping."""
+        self.obs = self.dolphin.get_frame() if self.minimap is None else self.minimap.render(self.dolphin.get_state())
+        return self.obs
+
+    def set_state_paths(self, paths: dict, **state_config):
+        """
+        Make `get_state` return `{name: value}` read through pointer chains, resolved once per scene.
+        See `mkwii_scripts/pointer_cache.py` (PointerCache) for the path format and options.
+        """
+        self.drain()
+        self.dolphin.set_state_paths({"paths": paths, **state_config})
+
+    def enable_minimap(
+        self,
+        track: Track,
+        racers: list[dict],
+        items: list[dict] = (),
+        cache_dir="course_maps",
+        size=32,
+        cell_size=256.0,
+        record=False,
+        **state_config,
+    ):
+        """
+        Observe a small top-down raster built from the racers' and items' positions in RAM (see
+        `minimap.Minimap`) instead of the rendered frame, which is no longer sent back. The positions are
+        read through `minimap_paths(racers, items)` chains along with each step, and the course layer
+        comes from the `CourseMap` of `track` cached in `cache_dir`, built beforehand with
+        `record_course_map`. With `record`, the racers' positions also grow the map, which then learns
+        wherever the agent drives, walls and off-road included. Frame sinks are skipped in this mode.
+
+        `state_config` is passed on to `PointerCache` (region, screen_id_address).
+        """
+        self.drain()
+        self.dolphin.set_state_paths({"paths": minimap_paths(racers, items), "every_step": True, **state_config})
+        self.dolphin.set_frame_output(False)
+        self.minimap = Minimap(CourseMap(track, cache_dir), len(racers), len(items), size, cell_size, record)
+        self.observation_space = Box(low=0, high=255, shape=(len(CHANNELS), size, size), dtype=np.uint8)
+
+    def record_course_map(
+        self,
+        track: Track,
+        racers: list[dict],
+        replays: list[list],
+        start_state: Savestate | None = None,
+        cache_dir="course_maps",
+        **state_config,
+    ) -> CourseMap:
+        """
+        Build the `CourseMap` of `track` that `enable_minimap` draws from known-good driving: every
+        replay is driven from `start_state` and the racers' positions are marked on the map, which is
+        saved to `cache_dir` and returned. Time-trial ghosts make good replays, their inputs drive the
+        player's kart along the course. A replay cut short by an emulator restart is abandoned.
+
+        Args:
+            racers (list[dict]): Racer position chains, as for `enable_minimap`.
+            replays (list[list]): `step` actions of each replay, e.g. `[ghost.actions() for ghost in ghosts]`.
+            start_state (Savestate, optional): State every replay starts from, e.g. the race start. None drives them one after another.
+            state_config: Passed on to `PointerCache` (region, screen_id_address).
+        """
+        if self.minimap is not None:
+            raise RuntimeError("The minimap is enabled, call disable_minimap() first")
+        self.drain()
+        self.dolphin.set_state_paths({"paths": minimap_paths(racers), "every_step": True, **state_config})
+        course_map = CourseMap(track, cache_dir)
+        names = [[f"racer{i}_{field}" for field in ("x", "z")] for i in range(len(racers))]
+        try:
+            for replay in replays:
+                if start_state is not None:
+                    self.restore(start_state)
+                for action in replay:
+                    _, _, _, info = self.step(action)
+                    if info.get("restarted"):
+                        self.dolphin.finish_boot()
+                        break
+                    if "state" in info:
+                        course_map.record(Minimap.values(info["state"], names))
+        finally:
+            self.drain()
+            self.dolphin.set_state_paths(None)
+        course_map.save()
+        return course_map
+
+    def disable_minimap(self):
+        """Back to frame observations. Saves the course map if it grew."""
+        if self.minimap is None:
+            return
+        self.drain()
+        self.dolphin.set_state_paths(None)
+        self.dolphin.set_frame_output(True)
+        self.close_minimap()
+
+    def close_minimap(self):
+        if self.minimap is not None and self.minimap.course_map.dirty:
+            self.minimap.course_map.save()
+        self.minimap = None
+
+    def enable_fast_forward(self, **fast_forward_config):
+        """
+        Let the emulator run through intros, countdowns and loading screens on its own, returning one
+        observation when control resumes. `info["skipped_frames"]` reports how many frames were skipped.
+        Results screens are left to the agent; `info["race_finished"]` is set on the step where the
+        race ends.
+        See `mkwii_scripts/fast_forward.py` (FastForward) for the options.
+        """
+        self.drain()
+        self.dolphin.set_fast_forward(fast_forward_config)
+
+    def disable_fast_forward(self):
+        self.drain()
+        self.dolphin.set_fast_forward(None)
+
+    def enable_rewind(self, interval=60, max_bytes=256 << 20, keyframe_every=8, level=1):
+        """
+        Keep a savestate every `interval` frames in an in-emulator ring capped at `max_bytes`
+        compressed, so `rewind` can go back without relaunching.
+        """
+        self.drain()
+        self.dolphin.set_rewind(
+            {"interval": interval, "max_bytes": max_bytes, "keyframe_every": keyframe_every, "level": level}
+        )
+
+    def disable_rewind(self):
+        self.drain()
+        self.dolphin.set_rewind(None)
+
+    def rewind(self, n_frames: int) -> int | None:
+        """Restore the game as it was `n_frames` frames ago. Returns the frame reached, or None."""
+        self.discard()
+        return self.dolphin.rewind(n_frames)
+
+    def get_stats(self) -> dict:
+        self.drain()
+        return self.dolphin.get_stats()
+
+    def profile_start(self, n_steps: int):
+        self.drain()
+        self.dolphin.profile_start(n_steps)
+
+    def profile_stop(self):
+        self.drain()
+        return self.dolphin.profile_stop()
+
+    def reset(self):
+        self.in_flight = False
+        self.pending = None
+        self.close_free_run()
+        return self.dolphin.reset()
+
+    async def areset(self):
+        self.in_flight = False
+        self.pending = None
+        self.close_free_run()
+        return await self.dolphin.areset()
+
+    def disconnect_pipe(self):
+        self.drain()
+        self.dolphin.disconnect_pipe()
+
+    def close(self):
+        for frame_sink in self.frame_sinks:
+            frame_sink.close()
+        self.dolphin.close()
+        self.close_free_run()
+        self.close_minimap()
+        super().close()
+
+    @enum.unique
+    class MacroFlags(enum.Flag):
+        NONE = 0
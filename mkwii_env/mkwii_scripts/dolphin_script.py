@@ -1,46 +1,195 @@
-import os
-import sys
-import asyncio
-import json
-import time
-
-
-sys.path.append(os.environ.get("MKWII_ENV_PATH", "/root/mkwii_env"))
-from actions import GCAction
-from enums import Commands
-from pipe_manager import PipeManager
-from mkwii_scripts.dolphin_manager import DolphinManager
-
-
-PIPE_PATH, DOLPHIN_ID = json.loads(sys.stdin.readline())
-pipe = PipeManager(PIPE_PATH=PIPE_PATH, DOLPHIN_ID=DOLPHIN_ID, remake=False)
-manager = DolphinManager()
-
-red = 0xFFFF0000
-
-steps = 0
-start = time.time()
-while True:
-    command = pipe.get_command()
-    match command:
-        case Commands.DO_ACTION:
-            action = pipe.get_data()
-            manager.set_action(action)
-            await manager.step()
-            pipe.send_data(manager.get_frame())
-        case Commands.GET_FRAME:
-            pipe.send_data(manager.get_frame())
-        case Commands.GET_STATE:
-            # manager.get_state()  # TODO: Not Implemented get_state
-            pipe.send_data(None)
-        case Commands.SET_WIIMOTE_POINTER:
-            controller_id, x, y = pipe.get_data()
-            manager.set_wiimote_pointer(controller_id, x, y)
-        case Commands.END:
-            break
-    # print(f"Step: {steps}")
-    steps += 1
-    if steps % 100 == 0:
-        print(f"Avg FPS: {steps / (time.time() - start)}")
-while True:
-    await manager.step()
+import os
+import sys
+import asyncio
+import json
+import time
+
+
+sys.path.append(os.environ.get("MKWII_ENV_PATH", "/root/mkwii_env"))
+from actions import GCAction
+from enums import Commands, PROTOCOL_VERSION
+from pipe_manager import PipeManager
+from batch_buffer import FrameSlot
+from free_run import FreeRunSlot
+from embedded_policy import evaluate
+from ram_snapshot import RamSnapshotWriter
+import shm
+from mkwii_scripts.dolphin_manager import DolphinManager
+from mkwii_scripts.profiler import ScriptProfiler
+from mkwii_scripts.rewind import RewindBuffer
+from mkwii_scripts.fast_forward import FastForward
+from mkwii_scripts.pointer_cache import PointerCache
+from mkwii_scripts.reload import reload_script
+
+
+PIPE_PATH, DOLPHIN_ID = json.loads(sys.stdin.readline())
+pipe = PipeManager(PIPE_PATH=PIPE_PATH, DOLPHIN_ID=DOLPHIN_ID, remake=False, side="script")
+manager = DolphinManager()
+profiler = ScriptProfiler(os.path.join(PIPE_PATH, str(DOLPHIN_ID)))
+rewind = None
+fast_forward = None
+frame_slot = None
+ram_reader = None
+ram_observation = None
+state_in_step = False
+send_frames = True
+
+
+def record_frame(action):
+    if rewind is not None:
+        frame = manager.frame_count
+        rewind.record(frame, action, manager.save_state() if rewind.should_capture(frame) else None)
+
+
+async def do_action(action):
+    manager.set_action(action)
+    await manager.step()
+    record_frame(action)
+    skipped = 0 if fast_forward is None else await fast_forward.skip(manager, record_frame)
+    step_info = {"frame_count": manager.frame_count, "skipped_frames": skipped}
+    if fast_forward is not None:
+        step_info["race_finished"] = fast_forward.race_finished
+    if ram_observation is not None:
+        step_info["ram_buffer"] = ram_observation.write_next(manager)
+    if state_in_step:
+        step_info["state"] = manager.get_state()
+    return step_info
+
+
+red = 0xFFFF0000
+
+steps = 0
+start = time.time()
+while True:
+    command = pipe.get_command()
+    match command:
+        case Commands.DO_ACTION:
+            step_info = await do_action(pipe.get_data())
+            pipe.send_data((manager.get_frame() if send_frames else None, step_info))
+        case Commands.DO_ACTION_INTO_BUFFER:
+            action, buffer_index = pipe.get_data()
+            step_info = await do_action(action)
+            frame_slot.write(buffer_index, manager.get_frame(), step_info)
+            pipe.send_data(step_info)
+        case Commands.SET_FRAME_BUFFER:
+            frame_buffer_spec = pipe.get_data()
+            if frame_slot is not None:
+                frame_slot.close()
+            frame_slot = None if frame_buffer_spec is None else FrameSlot(frame_buffer_spec)
+        case Commands.FREE_RUN:
+            # Draw frames without waiting for the client until it raises the stop flag.
+            free_run = FreeRunSlot(pipe.get_data())
+            action = {0: GCAction()}
+            frames = 0
+            while not free_run.stopped():
+                latched = free_run.read_action(manager.frame_count)
+                if latched is not None:
+                    action = latched
+                manager.set_action(action)
+                await manager.step()
+                record_frame(action)
+                free_run.write(manager.get_frame(), manager.frame_count)
+                frames += 1
+            pipe.send_data({"frames": frames, "actions": free_run.applied_action, "frame_count": manager.frame_count})
+            free_run.close()
+        case Commands.EVALUATE_POLICY:
+            evaluation = pipe.get_data()
+            start_state = evaluation.pop("start_state")
+            if start_state is not None:
+                name, size = start_state
+                state_shm = shm.attach(name)
+                start_state = bytes(state_shm.buf[:size])
+                state_shm.close()
+            result = await evaluate(manager, start_state=start_state, **evaluation)
+            # The rollouts jumped between savestates, the ring no longer describes one timeline.
+            if rewind is not None:
+                rewind.clear()
+            pipe.send_data(result)
+        case Commands.SET_RAM_OBSERVATION:
+            ram_observation_spec = pipe.get_data()
+            if ram_observation is not None:
+                ram_observation.close()
+            ram_observation = None if ram_observation_spec is None else RamSnapshotWriter(ram_observation_spec)
+        case Commands.READ_RAM:
+            ram_spec = pipe.get_data()
+            if ram_reader is None or ram_reader.shm.name != ram_spec["name"]:
+                if ram_reader is not None:
+                    ram_reader.close()
+                ram_reader = RamSnapshotWriter(ram_spec)
+            ram_reader.write(manager)
+            pipe.send_data(manager.frame_count)
+        case Commands.GET_FRAME:
+            pipe.send_data(manager.get_frame())
+        case Commands.GET_STATE:
+            pipe.send_data(manager.get_state())
+        case Commands.SET_STATE_PATHS:
+            state_config = pipe.get_data()
+            state_in_step = state_config is not None and state_config.pop("every_step", False)
+            manager.pointer_cache = None if state_config is None else PointerCache(**state_config)
+        case Commands.SET_FRAME_OUTPUT:
+            send_frames = pipe.get_data()
+        case Commands.SET_WIIMOTE_POINTER:
+            controller_id, x, y = pipe.get_data()
+            manager.set_wiimote_pointer(controller_id, x, y)
+        case Commands.HEARTBEAT:
+            pipe.send_data(manager.frame_count)
+        case Commands.PROFILE_START:
+            profiler.start(pipe.get_data())
+            continue
+        case Commands.PROFILE_STOP:
+            pipe.send_data(profiler.stop())
+        case Commands.SAVE_STATE:
+            data = manager.save_state()
+            # The last drawn frame follows the state, so `get_frame` is right again after a restore.
+            frame = manager.frame_data or b""
+            # Handed over to the client, which unlinks it when the Savestate is released.
+            state_shm = shm.create(len(data) + len(frame), owned=False)
+            state_shm.buf[: len(data)] = data
+            state_shm.buf[len(data) : len(data) + len(frame)] = frame
+            state_shm.close()
+            pipe.send_data((state_shm.name, len(data), manager.frame_count, (manager.width, manager.height, len(frame))))
+        case Commands.LOAD_STATE:
+            name, size, frame_count, (width, height, frame_size) = pipe.get_data()
+            state_shm = shm.attach(name)
+            manager.load_state(bytes(state_shm.buf[:size]))
+            if frame_size:
+                manager.width, manager.height = width, height
+                manager.frame_data = bytes(state_shm.buf[size : size + frame_size])
+            state_shm.close()
+            manager.frame_count = frame_count
+            if rewind is not None:
+                rewind.clear()
+            pipe.send_data(manager.frame_count)
+        case Commands.SET_REWIND:
+            rewind_config = pipe.get_data()
+            rewind = None if rewind_config is None else RewindBuffer(**rewind_config)
+        case Commands.REWIND:
+            n_frames = pipe.get_data()
+            frame = None if rewind is None else await rewind.rewind(n_frames, manager.frame_count, manager)
+            if frame is not None:
+                manager.frame_count = frame
+            pipe.send_data(frame)
+        case Commands.SET_FAST_FORWARD:
+            fast_forward_config = pipe.get_data()
+            fast_forward = None if fast_forward_config is None else FastForward(**fast_forward_config)
+        case Commands.GET_STATS:
+            pipe.send_data(
+                {
+                    "frame_count": manager.frame_count,
+                    "steps": steps,
+                    "rewind": None if rewind is None else rewind.stats(),
+                    "skipped_frames": None if fast_forward is None else fast_forward.total_skipped,
+                    "pointer_resolutions": None if manager.pointer_cache is None else manager.pointer_cache.resolutions,
+                }
+            )
+        case Commands.RELOAD:
+            pipe.send_data(reload_script(globals(), PROTOCOL_VERSION, pipe.get_data()))
+        case Commands.END:
+            break
+    profiler.tick()
+    # print(f"Step: {steps}")
+    steps += 1
+    if steps % 100 == 0:
+        print(f"Avg FPS: {steps / (time.time() - start)}")
+while True:
+    await manager.step()
@@ -0,0 +1,101 @@
+import zlib
+
+from enums import MemoryTypes, ScreenID
+from actions import GCAction
+from game_memory import RACE_INFO_POINTERS, RACE_STAGE_OFFSET, RACE_STAGE_RACING, RACE_STAGE_FINISHED, is_pointer
+
+NON_INTERACTIVE_SCREENS = (
+    ScreenID.ESRBnotice,
+    ScreenID.OpeningMovie,
+    ScreenID.Textboxwithspinner,
+    ScreenID.Largeinfoboxwithspinner,
+    ScreenID.Readingghostdatascreenwithtextspinner,
+    ScreenID.GPVSscoreupdatescreen,
+)
+
+
+class FastForward:
+    """
+    Runs non-interactive phases (intro camera, countdown, loading screens) inside the emulator with
+    `default_action`, so the client only sees the frame where control resumes.
+
+    A frame is non-interactive when any enabled check says so:
+    - the race stage read through `race_info_pointer` is the intro or the countdown (only while a
+      race is loaded). The finished stage is not skipped: its results screen waits for input that
+      `default_action` does not give, so it goes back to the client, and the step that reached it
+      reports `race_finished`;
+    - the u8 at `screen_id_address`, when given, is one of `non_interactive_screens`;
+    - with `static_frames`, the frame has not changed for that many frames (a cheap CRC over every
+      `hash_stride`-th byte). Off by default, as menus waiting for input are static too.
+
+    At most `max_skip` frames are skipped per step. `default_action` is applied while skipping, e.g.
+    hold A through the countdown to keep the start boost.
+    """
+
+    def __init__(
+        self,
+        region="RMCE",
+        race_info_pointer=None,
+        screen_id_address=None,
+        non_interactive_screens=NON_INTERACTIVE_SCREENS,
+        static_frames=0,
+        hash_stride=97,
+        max_skip=3600,
+        default_action=None,
+    ):
+        self.race_info_pointer = RACE_INFO_POINTERS[region] if race_info_pointer is None else race_info_pointer
+        self.screen_id_address = screen_id_address
+        self.non_interactive_screens = {screen.value for screen in non_interactive_screens}
+        self.static_frames = static_frames
+        self.hash_stride = hash_stride
+        self.max_skip = max_skip
+        self.default_action = {0: GCAction()} if default_action is None else default_action
+
+        self.last_hash = None
+        self.same_hash_frames = 0
+        self.total_skipped = 0
+        self.stage = None  # race stage of the last frame checked
+        self.race_finished = False  # whether the last `skip` ended on the frame the race finished
+
+    def race_stage(self, manager) -> int | None:
+        race_info = manager.get_memory(self.race_info_pointer, MemoryTypes.u32)
+        if not is_pointer(race_info):
+            return None
+        return manager.get_memory(race_info + RACE_STAGE_OFFSET, MemoryTypes.u32)
+
+    def is_static(self, manager) -> bool:
+        if not self.static_frames:
+            return False
+        _, _, frame_data = manager.get_frame()
+        frame_hash = zlib.crc32(frame_data[:: self.hash_stride])
+        if frame_hash == self.last_hash:
+            self.same_hash_frames += 1
+        else:
+            self.last_hash = frame_hash
+            self.same_hash_frames = 0
+        return self.same_hash_frames >= self.static_frames
+
+    def is_interactive(self, manager) -> bool:
+        self.stage = self.race_stage(manager)
+        if self.stage is not None and self.stage not in (RACE_STAGE_RACING, RACE_STAGE_FINISHED):
+            return False
+        if self.screen_id_address is not None:
+            if manager.get_memory(self.screen_id_address, MemoryTypes.u8) in self.non_interactive_screens:
+                return False
+        return not self.is_static(manager)
+
+    async def skip(self, manager, on_frame) -> int:
+        """
+        Advance through non-interactive frames. `on_frame(action)` is called after each skipped frame.
+        Returns the number of frames skipped.
+        """
+        previous_stage = self.stage
+        skipped = 0
+        while skipped < self.max_skip and not self.is_interactive(manager):
+            manager.set_action(self.default_action)
+            await manager.step()
+            on_frame(self.default_action)
+            skipped += 1
+        self.total_skipped += skipped
+        self.race_finished = self.stage == RACE_STAGE_FINISHED and previous_stage != RACE_STAGE_FINISHED
+        return skipped
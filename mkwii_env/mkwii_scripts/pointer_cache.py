@@ -0,0 +1,94 @@
+import struct
+
+from enums import MemoryTypes
+from game_memory import FORMATS, RACE_INFO_POINTERS, RACE_STAGE_OFFSET, follow
+
+
+# Fields this close are read as one span, the bytes between them read along.
+SPAN_GAP = 64
+
+
+def race_paths(region="RMCE") -> dict:
+    """Paths of the `Raceinfo` fields whose offsets are known, to extend with your own."""
+    return {"race_stage": ((RACE_INFO_POINTERS[region], RACE_STAGE_OFFSET), MemoryTypes.u32)}
+
+
+class PointerCache:
+    """
+    Reads of game structures reached through pointer chains (race manager -> player -> kart physics),
+    resolved once to flat addresses. Fields less than `SPAN_GAP` bytes apart are then read together
+    with one `read_bytes` and unpacked, so a state read costs one call per structure, not per field.
+
+    A chain is an int (a fixed address) or `(base, offset, ..., offset)`, see `game_memory.follow`.
+    Chains sharing a prefix share its reads when resolving.
+
+    The structures only move when a scene is torn down, so the resolved addresses are dropped when:
+    - the u8 at `screen_id_address` (a `ScreenID`), when given, changes;
+    - the `Raceinfo` pointer changes, which happens on every race start;
+    - a savestate is loaded (`DolphinManager.load_state` calls `invalidate`).
+    Fields whose chain is broken (not loaded yet) read as None and are retried on the next read.
+
+    Args:
+        paths (dict): `{name: (chain, MemoryTypes)}`, e.g. `race_paths()`.
+        region (str): Disc region, selects the `Raceinfo` pointer watched for race starts.
+        screen_id_address (int, optional): Address of the current `ScreenID`.
+    """
+
+    def __init__(self, paths: dict, region="RMCE", screen_id_address=None):
+        self.paths = dict(paths)
+        self.race_info_pointer = RACE_INFO_POINTERS[region]
+        self.screen_id_address = screen_id_address
+        self.scene = None
+        self.addresses = {}  # name -> resolved address, only for chains that resolved
+        self.spans = []  # [address, size, [(name, offset, struct.Struct)]] covering the resolved fields
+        self.resolutions = 0
+
+    def invalidate(self):
+        self.scene = None
+        self.addresses = {}
+        self.spans = []
+
+    def current_scene(self, manager) -> tuple:
+        race_info = manager.get_memory(self.race_info_pointer, MemoryTypes.u32)
+        if self.screen_id_address is None:
+            return (race_info,)
+        return race_info, manager.get_memory(self.screen_id_address, MemoryTypes.u8)
+
+    def resolve(self, manager):
+        """Resolve the chains not resolved yet."""
+        pointers = {}
+        for name, (chain, memory_type) in self.paths.items():
+            if name not in self.addresses:
+                address = follow(manager, chain, pointers)
+                if address is not None:
+                    self.addresses[name] = address
+        self.spans = self.group_spans()
+        self.resolutions += 1
+
+    def group_spans(self) -> list:
+        fields = sorted(
+            (address, name, struct.Struct(FORMATS[self.paths[name][1]])) for name, address in self.addresses.items()
+        )
+        spans = []
+        for address, name, unpacker in fields:
+            if not spans or address > spans[-1][0] + spans[-1][1] + SPAN_GAP:
+                spans.append([address, 0, []])
+            span = spans[-1]
+            span[1] = max(span[1], address + unpacker.size - span[0])
+            span[2].append((name, address - span[0], unpacker))
+        return spans
+
+    def read(self, manager) -> dict:
+        """`{name: value}` of every path."""
+        scene = self.current_scene(manager)
+        if scene != self.scene:
+            self.invalidate()
+            self.scene = scene
+        if len(self.addresses) < len(self.paths):
+            self.resolve(manager)
+        values = dict.fromkeys(self.paths)
+        for address, size, members in self.spans:
+            data = manager.read_bytes(address, size)
+            for name, offset, unpacker in members:
+                values[name] = unpacker.unpack_from(data, offset)[0]
+        return values
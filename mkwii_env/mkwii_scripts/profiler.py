@@ -0,0 +1,64 @@
+import cProfile
+import os
+import pstats
+
+
+class ScriptProfiler:
+    """
+    Deterministic profiler for the command loop of `dolphin_script.py`, toggled by the client.
+
+    `start(n_steps)` profiles the next `n_steps` commands, `tick()` is called once per command and
+    stops the window when it runs out. Stats are dumped to `output_dir/profile.prof` (readable with
+    `pstats` or snakeviz) and summarized for the client.
+    """
+
+    def __init__(self, output_dir: str, top=25):
+        self.output_dir = output_dir
+        self.top = top
+        self.profile = None
+        self.steps_left = 0
+        self.steps = 0
+        self.summary = None
+
+    def start(self, n_steps: int) -> None:
+        if self.profile is not None:
+            self.profile.disable()
+        self.profile = cProfile.Profile()
+        self.steps_left = n_steps
+        self.steps = 0
+        self.summary = None
+        self.profile.enable()
+
+    def tick(self) -> None:
+        if self.profile is None:
+            return
+        self.steps += 1
+        self.steps_left -= 1
+        if self.steps_left <= 0:
+            self.finish()
+
+    def stop(self) -> dict | None:
+        """Stop a running window early. Returns the summary of the latest window, if any."""
+        if self.profile is not None:
+            self.finish()
+        return self.summary
+
+    def finish(self) -> None:
+        self.profile.disable()
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, "profile.prof")
+        self.profile.dump_stats(path)
+
+        stats = pstats.Stats(self.profile)
+        functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        self.summary = {
+            "path": path,
+            "steps": self.steps,
+            "total_time": stats.total_tt,
+            # (file:line(function), calls, own time, cumulative time), by cumulative time
+            "top": [
+                (f"{filename}:{line}({name})", calls, tottime, cumtime)
+                for (filename, line, name), (_, calls, tottime, cumtime, _) in functions[: self.top]
+            ],
+        }
+        self.profile = None
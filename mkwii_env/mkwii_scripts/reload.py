@@ -0,0 +1,116 @@
+import enum
+import importlib
+import importlib.util
+import sys
+import traceback
+
+import enums
+
+
+# Script-side modules, in dependency order: a module comes after the ones it imports names from, so
+# its `from ... import` statements pick up the reloaded versions.
+SCRIPT_MODULES = (
+    "enums",
+    "game_memory",
+    "actions",
+    "shm",
+    "batch_buffer",
+    "free_run",
+    "mkwii_scripts.fast_forward",
+    "mkwii_scripts.rewind",
+    "mkwii_scripts.pointer_cache",
+    "mkwii_scripts.profiler",
+    "mkwii_scripts.dolphin_manager",
+    "embedded_policy",
+    "ram_snapshot",
+)
+# Kept across reloads: the pipe sessions live in these objects, they are only rebound.
+KEPT_MODULES = ("pipe_manager",)
+
+
+def disk_protocol_version() -> int:
+    """`PROTOCOL_VERSION` of `enums.py` as it is on disk now, read without touching the loaded module."""
+    spec = importlib.util.spec_from_file_location("_enums_on_disk", enums.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.PROTOCOL_VERSION
+
+
+def rebind(namespace: dict, modules: dict):
+    """Point the names `namespace` imported from `modules` at their reloaded versions."""
+    for name, value in list(namespace.items()):
+        module = modules.get(getattr(value, "__module__", None))
+        if module is not None and isinstance(value, type | type(rebind)):
+            namespace[name] = getattr(module, value.__name__, value)
+
+
+def migrate(value, modules: dict, seen: set):
+    """
+    `value` moved to the reloaded modules: enum members become the members of the new enum (they
+    would no longer compare equal), live objects switch to the new version of their class keeping
+    their state, and dicts, lists and tuples are migrated item by item.
+    """
+    cls = type(value)
+    if isinstance(value, enum.Enum):
+        module = modules.get(cls.__module__)
+        return value if module is None else getattr(module, cls.__name__)[value.name]
+    if cls in (dict, list, tuple):
+        if id(value) in seen:
+            return value
+        seen.add(id(value))
+        if cls is dict:
+            return {migrate(key, modules, seen): migrate(item, modules, seen) for key, item in value.items()}
+        return cls(migrate(item, modules, seen) for item in value)
+    module = modules.get(cls.__module__)
+    if module is not None and hasattr(value, "__dict__") and not isinstance(value, type) and id(value) not in seen:
+        seen.add(id(value))
+        value.__class__ = getattr(module, cls.__name__, cls)
+        for name, item in vars(value).items():
+            setattr(value, name, migrate(item, modules, seen))
+    return value
+
+
+def reload_script(namespace: dict, running_version: int, plugins=()) -> dict:
+    """
+    Re-import the script-side modules and `plugins` (module names, e.g. reward code) inside the
+    running emulator, then rebind the names `namespace` (the script's globals) imported from them
+    and move its live objects (`manager`, `fast_forward`, ...) to the new classes, so pipe sessions,
+    savestates and emulator state are kept.
+
+    The command loop of `dolphin_script.py` itself is not reloaded, so a change to `enums.py` that
+    bumps `PROTOCOL_VERSION` is refused: the running loop could not decode the new commands.
+
+    Returns:
+        {"protocol": version, "reloaded": [module names]}, with an "error" traceback if an import failed.
+    """
+    try:
+        version = disk_protocol_version()
+    except Exception:
+        return {"protocol": running_version, "error": traceback.format_exc()}
+    if version != running_version:
+        return {
+            "protocol": running_version,
+            "error": f"enums.py is now protocol {version}, the running script speaks {running_version}; restart the emulator",
+        }
+    modules = {}
+    result = {"protocol": running_version}
+    try:
+        for name in [*SCRIPT_MODULES, *plugins]:
+            if name in sys.modules:
+                modules[name] = importlib.reload(sys.modules[name])
+            else:
+                modules[name] = importlib.import_module(name)
+    except Exception:
+        result["error"] = traceback.format_exc()
+    # Even after a failure, what was reloaded must be rebound: commands from the client already
+    # unpickle to the new enum members.
+    for name in KEPT_MODULES:
+        if name in sys.modules:
+            rebind(vars(sys.modules[name]), modules)
+    rebind(namespace, modules)
+    seen = set()
+    for name, value in list(namespace.items()):
+        if not name.startswith("__"):
+            namespace[name] = migrate(value, modules, seen)
+    result["reloaded"] = list(modules)
+    return result
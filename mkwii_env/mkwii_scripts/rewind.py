@@ -0,0 +1,137 @@
+import collections
+import zlib
+
+import numpy as np
+
+
+class RewindBuffer:
+    """
+    Ring of recent savestates kept inside the emulator, for cheap "go back n frames" resets.
+
+    Every `interval` frames a savestate is captured. Every `keyframe_every`-th capture is stored whole
+    (zlib), the others as the zlib of their XOR against that keyframe, which is mostly zeros. The oldest
+    keyframe group is evicted whenever the compressed total exceeds `max_bytes`. The inputs applied on
+    every frame since the oldest capture are logged, so a rewind loads the nearest capture at or before
+    the target and replays them up to the exact frame.
+
+    Memory is `max_bytes` of compressed captures plus the newest keyframe kept raw as the delta base,
+    both reported by `stats()`.
+    """
+
+    def __init__(self, interval=60, max_bytes=256 << 20, keyframe_every=8, level=1):
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.keyframe_every = keyframe_every
+        self.level = level
+
+        self.evictions = 0
+        self.rewinds = 0
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget everything, e.g. after a savestate load moved the game to another timeline."""
+        self.entries = collections.deque()  # (frame, is_keyframe, compressed)
+        self.inputs = collections.deque()  # (frame, action applied to draw that frame)
+        self.keyframe = None  # raw bytes of the newest keyframe, the base of new deltas
+        self.captures = 0
+        self.stored_bytes = 0
+
+    def record(self, frame: int, action: dict, state: bytes | None = None) -> None:
+        """
+        Log the action that drew `frame`. `state` is the savestate after `frame`, only needed on
+        capture frames (see `should_capture`).
+        """
+        self.inputs.append((frame, action))
+        if state is not None:
+            self.capture(frame, state)
+
+    def should_capture(self, frame: int) -> bool:
+        return frame % self.interval == 0
+
+    def capture(self, frame: int, state: bytes) -> None:
+        is_keyframe = (
+            self.keyframe is None or self.captures % self.keyframe_every == 0 or len(state) != len(self.keyframe)
+        )
+        if is_keyframe:
+            self.keyframe = state
+            compressed = zlib.compress(state, self.level)
+        else:
+            delta = np.bitwise_xor(np.frombuffer(state, np.uint8), np.frombuffer(self.keyframe, np.uint8))
+            compressed = zlib.compress(delta.tobytes(), self.level)
+        self.entries.append((frame, is_keyframe, compressed))
+        self.captures += 1
+        self.stored_bytes += len(compressed)
+        self.evict()
+
+    def evict(self) -> None:
+        while self.stored_bytes > self.max_bytes and len(self.entries) > 1:
+            # Drop the oldest keyframe together with the deltas based on it.
+            _, _, compressed = self.entries.popleft()
+            self.stored_bytes -= len(compressed)
+            while self.entries and not self.entries[0][1]:
+                _, _, compressed = self.entries.popleft()
+                self.stored_bytes -= len(compressed)
+            self.evictions += 1
+        if self.entries:
+            oldest = self.entries[0][0]
+            while self.inputs and self.inputs[0][0] <= oldest:
+                self.inputs.popleft()
+        else:
+            self.keyframe = None
+
+    def decode(self, index: int) -> bytes:
+        _, is_keyframe, compressed = self.entries[index]
+        if is_keyframe:
+            return zlib.decompress(compressed)
+        base = index
+        while not self.entries[base][1]:
+            base -= 1
+        keyframe = np.frombuffer(zlib.decompress(self.entries[base][2]), np.uint8)
+        delta = np.frombuffer(zlib.decompress(compressed), np.uint8)
+        return np.bitwise_xor(delta, keyframe).tobytes()
+
+    async def rewind(self, n_frames: int, current_frame: int, manager) -> int | None:
+        """
+        Restore the game as it was `n_frames` ago. Returns the frame reached, or None when the target
+        is older than the buffer. Everything recorded after the target is discarded.
+        """
+        target = current_frame - n_frames
+        index = None
+        for i in range(len(self.entries) - 1, -1, -1):
+            if self.entries[i][0] <= target:
+                index = i
+                break
+        if index is None:
+            return None
+
+        frame = self.entries[index][0]
+        manager.load_state(self.decode(index))
+        replay = [(f, action) for f, action in self.inputs if frame < f <= target]
+        for _, action in replay:
+            manager.set_action(action)
+            await manager.step()
+
+        while self.entries and self.entries[-1][0] > target:
+            _, _, compressed = self.entries.pop()
+            self.stored_bytes -= len(compressed)
+        while self.inputs and self.inputs[-1][0] > target:
+            self.inputs.pop()
+        keyframe_index = len(self.entries) - 1
+        while keyframe_index > 0 and not self.entries[keyframe_index][1]:
+            keyframe_index -= 1
+        self.keyframe = self.decode(keyframe_index) if self.entries else None
+        self.rewinds += 1
+        return target
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "captures": len(self.entries),
+            "oldest_frame": self.entries[0][0] if self.entries else None,
+            "stored_bytes": self.stored_bytes,
+            "keyframe_bytes": len(self.keyframe) if self.keyframe is not None else 0,
+            "max_bytes": self.max_bytes,
+            "logged_inputs": len(self.inputs),
+            "evictions": self.evictions,
+            "rewinds": self.rewinds,
+        }
@@ -0,0 +1,151 @@
+import selectors
+import time
+
+from enums import Commands
+from mkwii_env import step_request
+from pipe_manager import NO_DATA, PendingRequest, PipeTimeoutError, PipeClosedError
+
+
+class Request(PendingRequest):
+    """A `PendingRequest` tagged with the instance it goes to and its deadline."""
+
+    def __init__(self, index: int, dolphin, command: Commands, data=NO_DATA, deadline=None):
+        super().__init__(dolphin.pipes, command, data)
+        self.index = index
+        self.dolphin = dolphin
+        self.deadline = deadline
+        self.read_fd = None
+
+
+class DolphinMultiplexer:
+    """
+    Drives many `Dolphin` instances from one thread with a `selectors` loop (epoll on Linux), instead
+    of one blocking thread or process per instance.
+
+    `submit` issues a command to an instance and returns immediately; `poll` waits until at least one
+    reply is ready and returns the ready set, `as_completed` yields replies in completion order. Each
+    instance has at most one request in flight, as the pipe protocol is sequential.
+
+    Completions are `(index, reply, error)`: `error` is a `PipeTimeoutError` when the instance missed
+    its deadline or a `PipeClosedError` when its process died, so the caller can restart it while the
+    others keep going.
+    """
+
+    RETRY_INTERVAL = 0.0002
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, dolphins: list, timeout=None):
+        self.dolphins = dolphins
+        self.timeout = timeout
+        self.selector = selectors.DefaultSelector()
+        self.requests = {}  # index -> Request
+        self.writing = set()  # indices with writes left
+        self.ready = []  # completions not returned yet
+
+    def submit(self, index: int, command: Commands, data=NO_DATA, timeout=None):
+        if index in self.requests:
+            raise ValueError(f"Dolphin {index} already has a request in flight")
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        request = Request(index, self.dolphins[index], command, data, deadline)
+        self.requests[index] = request
+        if request.reader is not None:
+            # Registered by descriptor: `PendingRead` closes itself as soon as the reply is complete.
+            request.read_fd = request.reader.fileno()
+            self.selector.register(request.read_fd, selectors.EVENT_READ, request)
+        self.writing.add(index)
+        self.advance(request)
+        return request
+
+    def step(self, index: int, action, buffer_index: int | None = None, timeout=None):
+        """Submit a `DO_ACTION` (or `DO_ACTION_INTO_BUFFER` into `buffer_index`)."""
+        command, data = step_request(action, buffer_index)
+        return self.submit(index, command, data, timeout)
+
+    def step_all(self, actions: list, buffer_index: int | None = None):
+        for index, action in enumerate(actions):
+            self.step(index, action, buffer_index)
+
+    def advance(self, request: Request):
+        """Push the request's writes forward. Requests without a reply complete once written."""
+        done = request.try_write()
+        if request.fd is not None and not done:
+            self.selector.register(request.fd, selectors.EVENT_WRITE, request)
+        if done:
+            self.writing.discard(request.index)
+            if request.reader is None:
+                self.finish(request, None, None)
+
+    def finish(self, request: Request, reply, error):
+        for fd in (request.read_fd, request.fd):
+            if fd is not None and fd in self.selector.get_map():
+                self.selector.unregister(fd)
+        request.close()
+        del self.requests[request.index]
+        self.writing.discard(request.index)
+        self.ready.append((request.index, reply, error))
+
+    def poll(self, timeout=None) -> list[tuple]:
+        """Wait up to `timeout` seconds (None: until something completes) and return the ready set."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.requests and not self.ready:
+            for index in list(self.writing):
+                request = self.requests[index]
+                if request.fd is None:
+                    self.advance(request)
+            if self.ready:
+                break
+
+            now = time.monotonic()
+            wait = self.POLL_INTERVAL
+            if self.writing:
+                wait = self.RETRY_INTERVAL
+            for request in self.requests.values():
+                if request.deadline is not None:
+                    wait = min(wait, max(0.0, request.deadline - now))
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - now))
+
+            for key, mask in self.selector.select(wait):
+                request = key.data
+                if mask & selectors.EVENT_WRITE:
+                    self.selector.unregister(key.fileobj)
+                    self.advance(request)
+                if mask & selectors.EVENT_READ and request.index in self.requests:
+                    try:
+                        if request.reader.on_readable():
+                            self.finish(request, request.reader.result(), None)
+                    except EOFError as e:
+                        self.finish(request, None, PipeClosedError(str(e)))
+
+            self.check_failures()
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        completed, self.ready = self.ready, []
+        return completed
+
+    def check_failures(self):
+        now = time.monotonic()
+        for request in list(self.requests.values()):
+            dolphin = request.dolphin
+            if not dolphin.is_running():
+                error = PipeClosedError(f"Dolphin {dolphin.DOLPHIN_ID} exited during {request.command.name}")
+                self.finish(request, None, error)
+            elif request.deadline is not None and now >= request.deadline:
+                error = PipeTimeoutError(f"Dolphin {dolphin.DOLPHIN_ID} did not answer {request.command.name} in time")
+                self.finish(request, None, error)
+
+    def as_completed(self, timeout=None):
+        """Yield `(index, reply, error)` as replies arrive, until no request is left in flight."""
+        while self.requests or self.ready:
+            yield from self.poll(timeout)
+
+    def gather(self) -> dict[int, tuple]:
+        """Wait for every request in flight. Returns {index: (reply, error)}."""
+        return {index: (reply, error) for index, reply, error in self.as_completed()}
+
+    def close(self):
+        for request in list(self.requests.values()):
+            self.finish(request, None, None)
+        self.ready = []
+        self.selector.close()
@@ -1,57 +1,314 @@
-import os
-import pickle
-import time
-import sys
-
-from enums import Commands, Controllers, MemoryTypes
-from actions import GCAction, WiiClassicAction, WiimoteAction, WiiNunchukAction, GBAAction
-
-class PipeManager:
-    def __init__(self, PIPE_PATH="/home/username/mario/Pipes", DOLPHIN_ID=0, remake=True):
-        self.PIPE_PATH = PIPE_PATH
-        self.DOLPHIN_ID = DOLPHIN_ID
-
-        self.MAIN_PIPE = os.path.join(PIPE_PATH, f"{DOLPHIN_ID}/main_pipe")
-        self.COMMAND_PIPE = os.path.join(PIPE_PATH, f"{DOLPHIN_ID}/command_pipe")
-
-        self.remake = remake
-
-        self.mkfifo(self.MAIN_PIPE)
-        self.mkfifo(self.COMMAND_PIPE)
-
-    def mkfifo(self, path):
-        if not os.path.exists(os.path.dirname(path)):
-            os.makedirs(os.path.dirname(path))
-        try:
-            os.mkfifo(path)
-        except OSError as e:
-            print(e)
-            if self.remake:
-                os.remove(path)
-                os.mkfifo(path)
-
-    def send_command(self, command: Commands):
-        with open(self.COMMAND_PIPE, "wb") as command_pipe:
-            pickle.dump(command, command_pipe)
-            command_pipe.flush()
-        time.sleep(0.00001)
-        # open(self.WAITING_PIPE, "rb").close()
-
-    def get_command(self) -> Commands:
-        with open(self.COMMAND_PIPE, "rb") as command_pipe:
-            # open(self.WAITING_PIPE, "wb").close()
-            command = pickle.load(command_pipe)
-        return command
-
-    def send_data(self, data):
-        with open(self.MAIN_PIPE, "wb") as main_pipe:
-            pickle.dump(data, main_pipe)
-            main_pipe.flush()
-        time.sleep(0.00001)
-        # open(self.WAITING_PIPE, "rb").close()
-
-    def get_data(self):
-        with open(self.MAIN_PIPE, "rb") as main_pipe:
-            data = pickle.load(main_pipe)
-            # open(self.WAITING_PIPE, "wb").close()
-        return data
+import asyncio
+import errno
+import os
+import pickle
+import select
+import time
+import sys
+
+from enums import Commands, Controllers, MemoryTypes
+from actions import GCAction, WiiClassicAction, WiimoteAction, WiiNunchukAction, GBAAction
+
+
+class PipeTimeoutError(TimeoutError):
+    """Raised when the other end of a pipe does not answer before the deadline."""
+
+
+class PipeClosedError(ConnectionError):
+    """Raised when the process on the other end of a pipe is no longer alive."""
+
+
+class ProtocolError(RuntimeError):
+    """Raised when the script inside the emulator speaks another protocol version, or refused a reload."""
+
+
+class PendingRead:
+    """
+    Incremental, non-blocking read of one pickled message from a FIFO.
+
+    The writer opens the FIFO, dumps one pickle and closes it, so a message is complete once the
+    read end reports EOF. `fileno()` makes instances usable with `select`, `selectors` and
+    `asyncio` readers.
+    """
+
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        self.chunks = []
+        self.done = False
+
+    def fileno(self):
+        return self.fd
+
+    def on_readable(self) -> bool:
+        """Consume whatever is available. Returns True once the whole message has arrived."""
+        while True:
+            try:
+                chunk = os.read(self.fd, self.CHUNK_SIZE)
+            except BlockingIOError:
+                return False
+            if not chunk:
+                if not self.chunks:
+                    raise EOFError(f"Writer closed {self.path} without sending data")
+                self.close()
+                self.done = True
+                return True
+            self.chunks.append(chunk)
+
+    def result(self):
+        assert self.done
+        return pickle.loads(b"".join(self.chunks))
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+# Commands the script answers on the reply pipe.
+REPLY_COMMANDS = {
+    Commands.DO_ACTION,
+    Commands.DO_ACTION_INTO_BUFFER,
+    Commands.GET_FRAME,
+    Commands.GET_STATE,
+    Commands.HEARTBEAT,
+    Commands.PROFILE_STOP,
+    Commands.SAVE_STATE,
+    Commands.LOAD_STATE,
+    Commands.REWIND,
+    Commands.GET_STATS,
+    Commands.EVALUATE_POLICY,
+    Commands.READ_RAM,
+    Commands.RELOAD,
+}
+
+NO_DATA = object()
+
+
+class PendingRequest:
+    """
+    One command in flight, driven without blocking: the command and its data are written through
+    non-blocking FIFO descriptors, then the reply (for `REPLY_COMMANDS`) is read with a `PendingRead`.
+    """
+
+    def __init__(self, pipes: "PipeManager", command: Commands, data=NO_DATA):
+        self.command = command
+        self.writes = [(pipes.COMMAND_PIPE, pickle.dumps(command))]
+        if data is not NO_DATA:
+            self.writes.append((pipes.DATA_OUT, pickle.dumps(data)))
+        # The reply pipe has no other reader, so it is safe to open it before anything is sent.
+        self.reader = PendingRead(pipes.DATA_IN) if command in REPLY_COMMANDS else None
+        self.path = None
+        self.fd = None
+        self.view = None
+
+    def try_write(self) -> bool:
+        """Make as much progress on the writes as possible. Returns True once everything is written."""
+        while self.writes or self.fd is not None:
+            if self.fd is None:
+                path, payload = self.writes[0]
+                try:
+                    self.fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+                except OSError as e:
+                    # ENXIO: the script has not opened this pipe yet, try again later.
+                    if e.errno != errno.ENXIO:
+                        raise
+                    return False
+                self.path = path
+                self.view = memoryview(payload)
+                self.writes.pop(0)
+            try:
+                self.view = self.view[os.write(self.fd, self.view) :]
+            except BlockingIOError:
+                return False
+            if self.view:
+                return False
+            os.close(self.fd)
+            self.fd = None
+        return True
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        if self.reader is not None:
+            self.reader.close()
+
+
+class PipeManager:
+    """
+    Pickle-over-FIFO transport between the client and the script running inside Dolphin.
+
+    Commands and client data go through `command_pipe` and `main_pipe`, replies through `reply_pipe`.
+    Each FIFO has a single reader, so a reader can never pick up a message it sent itself.
+
+    With `timeout=None` every call blocks like a plain file open. With a timeout, the client side
+    uses non-blocking descriptors and `select`, raising `PipeTimeoutError` once the deadline passes
+    and `PipeClosedError` as soon as `is_alive()` reports that the peer died.
+    """
+
+    POLL_INTERVAL = 0.5
+    RETRY_INTERVAL = 0.0005
+
+    def __init__(
+        self,
+        PIPE_PATH="/home/username/mario/Pipes",
+        DOLPHIN_ID=0,
+        remake=True,
+        timeout=None,
+        is_alive=None,
+        side="client",
+    ):
+        self.PIPE_PATH = PIPE_PATH
+        self.DOLPHIN_ID = DOLPHIN_ID
+
+        self.MAIN_PIPE = os.path.join(PIPE_PATH, f"{DOLPHIN_ID}/main_pipe")
+        self.COMMAND_PIPE = os.path.join(PIPE_PATH, f"{DOLPHIN_ID}/command_pipe")
+        self.REPLY_PIPE = os.path.join(PIPE_PATH, f"{DOLPHIN_ID}/reply_pipe")
+
+        assert side in ["client", "script"]
+        self.side = side
+        self.DATA_OUT = self.MAIN_PIPE if side == "client" else self.REPLY_PIPE
+        self.DATA_IN = self.REPLY_PIPE if side == "client" else self.MAIN_PIPE
+
+        self.remake = remake
+        self.timeout = timeout
+        self.is_alive = is_alive
+
+        self.mkfifo(self.MAIN_PIPE)
+        self.mkfifo(self.COMMAND_PIPE)
+        self.mkfifo(self.REPLY_PIPE)
+
+    def mkfifo(self, path):
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        try:
+            os.mkfifo(path)
+        except OSError as e:
+            print(e)
+            if self.remake:
+                os.remove(path)
+                os.mkfifo(path)
+
+    def send_command(self, command: Commands, timeout=None):
+        self.write(self.COMMAND_PIPE, pickle.dumps(command), timeout)
+        time.sleep(0.00001)
+        # open(self.WAITING_PIPE, "rb").close()
+
+    def get_command(self) -> Commands:
+        with open(self.COMMAND_PIPE, "rb") as command_pipe:
+            # open(self.WAITING_PIPE, "wb").close()
+            command = pickle.load(command_pipe)
+        return command
+
+    def send_data(self, data, timeout=None):
+        self.write(self.DATA_OUT, pickle.dumps(data), timeout)
+        time.sleep(0.00001)
+        # open(self.WAITING_PIPE, "rb").close()
+
+    def get_data(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            with open(self.DATA_IN, "rb") as main_pipe:
+                data = pickle.load(main_pipe)
+                # open(self.WAITING_PIPE, "wb").close()
+            return data
+
+        deadline = time.monotonic() + timeout
+        pending = PendingRead(self.DATA_IN)
+        try:
+            while True:
+                readable, _, _ = select.select([pending], [], [], self.wait_interval(deadline))
+                if readable and pending.on_readable():
+                    return pending.result()
+                self.check_peer(deadline, self.DATA_IN)
+        finally:
+            pending.close()
+
+    def write(self, path, payload: bytes, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            with open(path, "wb") as pipe:
+                pipe.write(payload)
+                pipe.flush()
+            return
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+                break
+            except OSError as e:
+                # ENXIO: nobody has the read end open yet.
+                if e.errno != errno.ENXIO:
+                    raise
+            self.check_peer(deadline, path)
+            time.sleep(min(self.RETRY_INTERVAL, self.wait_interval(deadline)))
+        try:
+            view = memoryview(payload)
+            while view:
+                _, writable, _ = select.select([], [fd], [], self.wait_interval(deadline))
+                if writable:
+                    try:
+                        view = view[os.write(fd, view) :]
+                    except BlockingIOError:
+                        pass
+                    continue
+                self.check_peer(deadline, path)
+        finally:
+            os.close(fd)
+
+    async def arequest(self, command: Commands, data=NO_DATA, timeout=None):
+        """
+        Send `command` (and `data`) and return the reply, without blocking the event loop: descriptors
+        are awaited with `loop.add_reader`/`add_writer`, opens that fail with ENXIO are retried with
+        `asyncio.sleep`. Commands outside `REPLY_COMMANDS` return None once written.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        request = PendingRequest(self, command, data)
+        try:
+            while not request.try_write():
+                if request.fd is None:
+                    await asyncio.sleep(self.RETRY_INTERVAL)
+                    self.check_peer(deadline, request.writes[0][0])
+                else:
+                    await self.wait_fd(request.fd, False, deadline, request.path)
+            if request.reader is None:
+                return None
+            while True:
+                await self.wait_fd(request.reader.fileno(), True, deadline, request.reader.path)
+                if request.reader.on_readable():
+                    return request.reader.result()
+        except EOFError as e:
+            raise PipeClosedError(str(e))
+        finally:
+            request.close()
+
+    async def wait_fd(self, fd, readable: bool, deadline, path):
+        """Wait until `fd` is readable (or writable), checking the peer every `POLL_INTERVAL`."""
+        loop = asyncio.get_running_loop()
+        add, remove = (loop.add_reader, loop.remove_reader) if readable else (loop.add_writer, loop.remove_writer)
+        while True:
+            ready = loop.create_future()
+            add(fd, lambda: ready.done() or ready.set_result(None))
+            try:
+                await asyncio.wait([ready], timeout=self.wait_interval(deadline))
+            finally:
+                remove(fd)
+            if ready.done():
+                return
+            self.check_peer(deadline, path)
+
+    def wait_interval(self, deadline) -> float:
+        if deadline is None:
+            return self.POLL_INTERVAL
+        return max(0.0, min(self.POLL_INTERVAL, deadline - time.monotonic()))
+
+    def check_peer(self, deadline, path):
+        if self.is_alive is not None and not self.is_alive():
+            raise PipeClosedError(f"Dolphin {self.DOLPHIN_ID} exited while waiting on {path}")
+        if deadline is not None and time.monotonic() >= deadline:
+            raise PipeTimeoutError(f"Dolphin {self.DOLPHIN_ID} did not answer on {path} in time")
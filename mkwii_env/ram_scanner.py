@@ -0,0 +1,137 @@
+import numpy as np
+
+from enums import MemoryTypes
+from game_memory import FORMATS, REGIONS
+from ram_snapshot import RamSnapshotBuffer
+
+
+DTYPES = {memory_type: np.dtype(format) for memory_type, format in FORMATS.items()}
+
+MODES = ("changed", "unchanged", "increased", "decreased", "equal", "range")
+
+
+class RamScanner:
+    """
+    Cheat-Engine-style search for game-state addresses (drift counter, boost timer, respawn flag...).
+
+    Every `scan` bulk-copies the regions into shared memory (see `RamSnapshotBuffer`) and narrows
+    the candidate addresses of every memory type at once with vectorized comparisons against the
+    previous scan: "changed", "unchanged", "increased", "decreased", "equal" (to `value`, within
+    `tolerance`) or "range" (`low <= v <= high`). The first scan may also be unfiltered ("unknown
+    initial value").
+
+    Candidates are kept compactly: "every address" is implicit until the first narrowing, after that
+    as a uint32 index array plus the values seen at the last scan.
+
+    Args:
+        env: An `MKWiiEnv` or `Dolphin`.
+        memory_types (list[MemoryTypes]): Interpretations searched in parallel.
+        regions (dict): `{name: (address, size)}` to search. Defaults to MEM1 and MEM2.
+        aligned (bool): Only consider addresses that are multiples of the type size, as the game's own fields are.
+    """
+
+    def __init__(self, env, memory_types=(MemoryTypes.u32,), regions=None, aligned=True):
+        self.env = env
+        self.memory_types = list(memory_types)
+        self.regions = dict(REGIONS if regions is None else regions)
+        self.aligned = aligned
+        self.buffer = RamSnapshotBuffer(self.regions)
+        self.keys = [(region, memory_type) for region in self.regions for memory_type in self.memory_types]
+        self.reset()
+
+    def reset(self):
+        """Start a new search."""
+        self.candidates = {}  # (region, memory_type) -> None (every address) or element indices
+        self.previous = {}  # (region, memory_type) -> values at the candidates on the last scan
+        self.scans = 0
+        self.frame_count = None
+
+    def view(self, region: str, memory_type: MemoryTypes) -> np.ndarray:
+        """The last snapshot of `region` as big-endian `memory_type` values, one per candidate position."""
+        data = self.buffer.arrays[region]
+        dtype = DTYPES[memory_type]
+        if self.aligned:
+            return data[: len(data) // dtype.itemsize * dtype.itemsize].view(dtype)
+        return np.ndarray((len(data) - dtype.itemsize + 1,), dtype, data, 0, (1,))
+
+    def address(self, region: str, memory_type: MemoryTypes, index):
+        stride = DTYPES[memory_type].itemsize if self.aligned else 1
+        return self.regions[region][0] + np.asarray(index, np.int64) * stride
+
+    def snapshot(self):
+        self.frame_count = self.env.read_ram(self.buffer.spec())
+
+    def scan(self, mode=None, value=None, low=None, high=None, tolerance=0.0) -> int:
+        """
+        Snapshot the regions and keep the candidates matching `mode` (None keeps every candidate and
+        only records the values). Returns the number of candidates left.
+        """
+        assert mode is None or mode in MODES
+        if mode in ("changed", "unchanged", "increased", "decreased") and not self.scans:
+            raise ValueError(f"'{mode}' compares against a previous scan")
+        self.snapshot()
+        for key in self.keys:
+            view = self.view(*key)
+            native = view.dtype.newbyteorder("=")
+            indices = self.candidates.get(key)
+            # Native-endian copy: the comparisons run faster, and the buffer is reused by the next scan.
+            current = view.astype(native) if indices is None else view[indices].astype(native)
+            if mode is not None:
+                keep = self.compare(mode, current, self.previous.get(key), value, low, high, tolerance)
+                indices = np.flatnonzero(keep).astype(np.uint32) if indices is None else indices[keep]
+                current = current[keep]
+            self.candidates[key] = indices
+            self.previous[key] = current
+        self.scans += 1
+        return self.count()
+
+    @staticmethod
+    def compare(mode, current, previous, value, low, high, tolerance) -> np.ndarray:
+        match mode:
+            case "changed" | "unchanged":
+                same = current == previous
+                if current.dtype.kind == "f":
+                    same |= np.isnan(current) & np.isnan(previous)
+                return ~same if mode == "changed" else same
+            case "increased":
+                return current > previous
+            case "decreased":
+                return current < previous
+            case "equal":
+                if tolerance:
+                    return np.abs(current - value) <= tolerance
+                return current == value
+            case "range":
+                return (current >= low) & (current <= high)
+
+    def count(self) -> int:
+        total = 0
+        for key in self.keys:
+            indices = self.candidates.get(key)
+            total += len(self.view(*key)) if indices is None else len(indices)
+        return total
+
+    def results(self, limit=100) -> list[tuple[int, MemoryTypes, int | float]]:
+        """Up to `limit` candidates as `(address, memory_type, value at the last scan)`."""
+        results = []
+        for region, memory_type in self.keys:
+            key = (region, memory_type)
+            if key not in self.previous:
+                continue
+            indices = self.candidates[key]
+            values = self.previous[key][: limit - len(results)]
+            indices = np.arange(len(values)) if indices is None else indices[: len(values)]
+            for address, value in zip(self.address(region, memory_type, indices).tolist(), values.tolist()):
+                results.append((address, memory_type, value))
+            if len(results) >= limit:
+                break
+        return results
+
+    def close(self):
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
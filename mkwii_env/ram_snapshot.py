@@ -0,0 +1,102 @@
+import numpy as np
+
+import shm
+from batch_buffer import aligned_size
+from game_memory import REGIONS
+
+
+def ranges_layout(ranges: dict[str, tuple[int, int]]) -> list[tuple[str, int, int, int]]:
+    """`(name, address, size, offset)` of each range, packed 64-byte aligned in one segment."""
+    layout = []
+    offset = 0
+    for name, (address, size) in ranges.items():
+        layout.append((name, address, size, offset))
+        offset += aligned_size((size,), np.uint8)
+    return layout
+
+
+def copy_size(layout: list[tuple[str, int, int, int]]) -> int:
+    _, _, size, offset = layout[-1]
+    return offset + aligned_size((size,), np.uint8)
+
+
+class RamSnapshotBuffer:
+    """
+    Shared memory copy of some ranges of the emulated RAM, filled by the script with bulk reads
+    (`RamSnapshotWriter`), so whole regions cross the process boundary without being pickled.
+
+    Args:
+        ranges (dict): `{name: (address, size)}`, e.g. `REGIONS` or `{"MEM1": REGIONS["MEM1"]}`.
+        copies (int): Independent copies of the ranges, e.g. 2 to read one while the other is written.
+    """
+
+    def __init__(self, ranges: dict[str, tuple[int, int]], copies=1):
+        self.ranges = dict(ranges)
+        self.layout = ranges_layout(self.ranges)
+        self.copies = copies
+        self.shm = shm.create(copies * copy_size(self.layout))
+        self.buffers = [
+            {
+                name: np.ndarray((size,), np.uint8, self.shm.buf, copy * copy_size(self.layout) + offset)
+                for name, address, size, offset in self.layout
+            }
+            for copy in range(copies)
+        ]
+        self.arrays = self.buffers[0]
+
+    def spec(self) -> dict:
+        return {"name": self.shm.name, "ranges": self.ranges, "copies": self.copies}
+
+    def close(self):
+        self.arrays = self.buffers = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class RamObservation(RamSnapshotBuffer):
+    """
+    RAM ranges copied after every step as part of the observation, declared once per instance with
+    `Dolphin(RAM_OBSERVATION=...)`. Double-buffered: a step writes the copy its reply points to
+    (`ram_buffer`), so the ranges returned by one step stay intact while the next one runs.
+
+    Args:
+        ranges (dict): `{name: (address, size, dtype)}`; `dtype` (e.g. "u1", ">u4", ">f4") is how `views` exposes the bytes.
+    """
+
+    def __init__(self, ranges: dict[str, tuple[int, int, str]]):
+        super().__init__({name: (address, size) for name, (address, size, dtype) in ranges.items()}, copies=2)
+        self.dtypes = {name: np.dtype(dtype) for name, (address, size, dtype) in ranges.items()}
+        self.views = [{name: self.view(array, self.dtypes[name]) for name, array in buffer.items()} for buffer in self.buffers]
+
+    @staticmethod
+    def view(array: np.ndarray, dtype: np.dtype) -> np.ndarray:
+        return array[: len(array) // dtype.itemsize * dtype.itemsize].view(dtype)
+
+    def close(self):
+        self.views = None
+        super().close()
+
+
+class RamSnapshotWriter:
+    """Script-side end of a client's `RamSnapshotBuffer`."""
+
+    def __init__(self, spec: dict):
+        self.shm = shm.attach(spec["name"])
+        self.layout = ranges_layout(spec["ranges"])
+        self.copies = spec.get("copies", 1)
+        self.writes = 0
+
+    def write(self, manager, copy=0):
+        base = copy * copy_size(self.layout)
+        for name, address, size, offset in self.layout:
+            self.shm.buf[base + offset : base + offset + size] = manager.read_bytes(address, size)
+
+    def write_next(self, manager) -> int:
+        """Write the next copy in turn. Returns its index."""
+        copy = self.writes % self.copies
+        self.write(manager, copy)
+        self.writes += 1
+        return copy
+
+    def close(self):
+        self.shm.close()
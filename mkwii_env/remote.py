@@ -0,0 +1,269 @@
+import collections
+import hashlib
+import hmac
+import math
+import os
+import pickle
+import socket
+import struct
+import zlib
+
+import gym
+
+from actions import GCAction, WiiClassicAction, WiimoteAction, WiiNunchukAction, GBAAction
+
+
+HEADER = struct.Struct(">BI")  # flags, payload length
+COMPRESSED = 0x01
+COMPRESS_THRESHOLD = 4096
+
+SECRET_ENV = "MKWII_ENV_SECRET"
+NONCE_SIZE = 32
+HANDSHAKE_TIMEOUT = 10.0
+
+
+def parse_address(address: str) -> tuple[int, str | tuple[str, int]]:
+    """
+    "tcp://host:port" or "unix:///path/to/socket" -> (socket family, socket address).
+    """
+    if address.startswith("unix://"):
+        return socket.AF_UNIX, address[len("unix://") :]
+    if address.startswith("tcp://"):
+        host, port = address[len("tcp://") :].rsplit(":", 1)
+        return socket.AF_INET, (host, int(port))
+    raise ValueError(f"Invalid address: {address}")
+
+
+def connect(address: str) -> socket.socket:
+    family, sockaddr = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.connect(sockaddr)
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def send_message(sock: socket.socket, obj, compress=False):
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    flags = 0
+    if compress and len(payload) > COMPRESS_THRESHOLD:
+        payload = zlib.compress(payload, 1)
+        flags |= COMPRESSED
+    sock.sendall(HEADER.pack(flags, len(payload)))
+    sock.sendall(payload)
+
+
+def recv_exactly(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    while view:
+        n = sock.recv_into(view)
+        if n == 0:
+            raise ConnectionError("Connection closed by peer")
+        view = view[n:]
+    return buffer
+
+
+def load_secret(secret: str | bytes | None = None) -> bytes:
+    """The secret shared by a server and its clients: `secret`, else the `MKWII_ENV_SECRET` environment variable."""
+    secret = os.environ.get(SECRET_ENV) if secret is None else secret
+    if not secret:
+        raise ValueError(f"No shared secret: pass one or set {SECRET_ENV} on the server and its clients")
+    return secret.encode() if isinstance(secret, str) else secret
+
+
+def mac(secret: bytes, role: bytes, nonce: bytes) -> bytes:
+    return hmac.new(secret, role + nonce, hashlib.sha256).digest()
+
+
+def authenticate_client(sock: socket.socket, secret: bytes) -> bool:
+    """
+    Server side of the handshake, in raw bytes before any pickle is read: the client proves it knows
+    the secret by answering a random challenge with its HMAC, then the server answers the client's.
+    """
+    nonce = os.urandom(NONCE_SIZE)
+    sock.sendall(nonce)
+    reply = bytes(recv_exactly(sock, 2 * NONCE_SIZE))
+    if not hmac.compare_digest(reply[:NONCE_SIZE], mac(secret, b"client", nonce)):
+        return False
+    sock.sendall(mac(secret, b"server", reply[NONCE_SIZE:]))
+    return True
+
+
+def authenticate_server(sock: socket.socket, secret: bytes):
+    """Client side of the handshake, see `authenticate_client`."""
+    nonce = bytes(recv_exactly(sock, NONCE_SIZE))
+    own_nonce = os.urandom(NONCE_SIZE)
+    sock.sendall(mac(secret, b"client", nonce) + own_nonce)
+    try:
+        proof = bytes(recv_exactly(sock, NONCE_SIZE))
+    except ConnectionError:
+        raise ConnectionError("The server rejected the shared secret") from None
+    if not hmac.compare_digest(proof, mac(secret, b"server", own_nonce)):
+        raise ConnectionError("The server does not know the shared secret")
+
+
+def recv_message(sock: socket.socket):
+    flags, length = HEADER.unpack(recv_exactly(sock, HEADER.size))
+    payload = recv_exactly(sock, length)
+    if flags & COMPRESSED:
+        payload = zlib.decompress(payload)
+    return pickle.loads(payload)
+
+
+class RemoteMKWiiEnv(gym.Env):
+    """
+    Drop-in replacement for `MKWiiEnv` whose Dolphin instance is owned by an `EnvServer`, possibly on
+    another node.
+
+    Requests are pipelined: `step_async` only sends, `step_wait` collects the oldest outstanding reply,
+    so a client driving several remote envs can have all of them emulating while replies travel.
+    Every other method waits for its own reply, so it raises while steps are outstanding.
+    `close()` only drops the connection; the emulator belongs to the server and keeps running.
+
+    Only methods whose arguments and results pickle across nodes are forwarded. Those built on
+    shared memory stay local-only: `snapshot`/`restore` and `evaluate_policy`'s `start_state`
+    (savestate segments), `read_ram` (RAM copies), `start_free_run` (the latest-frame slot) and the
+    batch buffer; so do the minimap, computed from per-step state next to the env, and frame sinks.
+
+    The connection starts with an HMAC handshake on a secret shared with the server (see
+    `authenticate_client`); nothing is unpickled before both sides have proven they know it.
+
+    Args:
+        address (str): "tcp://host:port" or "unix:///path/to/socket" of the server.
+        DOLPHIN_ID: The server-side instance to attach to.
+        compress (bool): Ask the server to zlib-compress large replies such as frames.
+        secret (str | bytes, optional): The server's shared secret, defaults to `MKWII_ENV_SECRET`.
+    """
+
+    def __init__(self, address: str, DOLPHIN_ID=0, compress=False, secret=None):
+        self.address = address
+        self.DOLPHIN_ID = DOLPHIN_ID
+        self.compress = compress
+        self.pending = collections.deque()
+
+        self.sock = connect(address)
+        self.sock.settimeout(HANDSHAKE_TIMEOUT)
+        authenticate_server(self.sock, load_secret(secret))
+        self.sock.settimeout(None)
+        send_message(self.sock, {"DOLPHIN_ID": DOLPHIN_ID, "compress": compress})
+        self.observation_space = self.receive()
+
+    def request(self, method: str, *args, **kwargs):
+        send_message(self.sock, (method, args, kwargs), self.compress)
+        self.pending.append(method)
+
+    def receive(self):
+        status, value = recv_message(self.sock)
+        if status == "error":
+            raise value
+        return value
+
+    def call(self, method: str, *args, **kwargs):
+        if self.pending:
+            raise RuntimeError(f"{len(self.pending)} step(s) still outstanding, collect them with step_wait() first")
+        self.request(method, *args, **kwargs)
+        return self.result()
+
+    def result(self):
+        """Reply to the oldest outstanding request."""
+        self.pending.popleft()
+        return self.receive()
+
+    def step_async(
+        self,
+        action: (
+            dict[int, GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction]
+            | GCAction
+            | WiiClassicAction
+            | WiimoteAction
+            | WiiNunchukAction
+            | GBAAction
+        ) = GCAction(),
+    ):
+        self.request("step", action)
+
+    def step_wait(self):
+        return self.result()
+
+    def step(
+        self,
+        action: (
+            dict[int, GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction]
+            | GCAction
+            | WiiClassicAction
+            | WiimoteAction
+            | WiiNunchukAction
+            | GBAAction
+        ) = GCAction(),
+    ):
+        self.step_async(action)
+        return self.step_wait()
+
+    def set_wiimote_pointer(self, controller_id: int, x: float, y: float):
+        return self.call("set_wiimote_pointer", controller_id, x, y)
+
+    def get_obs(self):
+        return self.call("get_obs")
+
+    def get_frame(self):
+        return self.call("get_frame")
+
+    def get_state(self):
+        return self.call("get_state")
+
+    def enable_fast_forward(self, **fast_forward_config):
+        return self.call("enable_fast_forward", **fast_forward_config)
+
+    def disable_fast_forward(self):
+        return self.call("disable_fast_forward")
+
+    def enable_rewind(self, interval=60, max_bytes=256 << 20, keyframe_every=8, level=1):
+        return self.call("enable_rewind", interval, max_bytes, keyframe_every, level)
+
+    def disable_rewind(self):
+        return self.call("disable_rewind")
+
+    def rewind(self, n_frames: int):
+        return self.call("rewind", n_frames)
+
+    def get_stats(self):
+        return self.call("get_stats")
+
+    def set_state_paths(self, paths: dict, **state_config):
+        return self.call("set_state_paths", paths, **state_config)
+
+    def evaluate_policy(self, policy: dict, episodes=1, max_frames=60 * 60 * 5, done=(), summary=None, sample_every=0, timeout=math.inf):
+        return self.call(
+            "evaluate_policy",
+            policy,
+            episodes=episodes,
+            max_frames=max_frames,
+            done=list(done),
+            summary=summary,
+            sample_every=sample_every,
+            timeout=timeout,
+        )
+
+    def reload(self, modules=()):
+        return self.call("reload", list(modules))
+
+    def profile_start(self, n_steps: int):
+        return self.call("profile_start", n_steps)
+
+    def profile_stop(self):
+        return self.call("profile_stop")
+
+    def reset(self):
+        return self.call("reset")
+
+    def disconnect_pipe(self):
+        return self.call("disconnect_pipe")
+
+    def close(self):
+        try:
+            while self.pending:
+                self.result()
+        finally:
+            self.sock.close()
+            super().close()
@@ -0,0 +1,215 @@
+import zlib
+
+import numpy as np
+
+
+def frame_array(obs) -> np.ndarray:
+    """An observation as a uint8 array: `(width, height, data)` frames become `(H, W, C)`, arrays pass through."""
+    if isinstance(obs, tuple):
+        width, height, data = obs
+        return np.frombuffer(data, np.uint8).reshape(height, width, -1)
+    return np.asarray(obs, np.uint8)
+
+
+class ReplayBuffer:
+    """
+    Replay buffer of frame-stacked transitions that stores every frame once.
+
+    Frames go to a circular uint8 array in the order they are added; a transition only holds the
+    numbers of the `stack` frames of its observation and of its next frame (the next observation is
+    the same stack shifted by one), so a naive buffer's `2 * stack` frames per transition shrink to
+    about one. Stacks are rebuilt at sample time with one vectorized gather. The first frame of an
+    episode is repeated to fill its first stacks, and frames of different episodes or instances are
+    never stacked together, however the instances interleave.
+
+    With `compressed_frames`, frames leaving the `frames` most recent ones are zlib-compressed into a
+    second tier holding `compressed_frames` more, so old data costs its compressed size (emulator
+    frames, with their flat areas, compress well even at level 1). Sampled compressed frames are
+    decompressed once per batch each. Transitions whose frames are no longer kept are never sampled.
+
+    Episodes follow the env: `start(obs)` begins one with the first observation after a reset, `add`
+    records each step and ends the episode on `done`. A step the env returns after restarting a
+    failed emulator (`info["restarted"]`) carries a stale observation and an action that was never
+    applied, so it is not stored and the episode ends there; other `TimeLimit.truncated` steps are
+    stored with `dones` False, so they bootstrap. Neither are the steps returned while the emulator
+    boots again (`info["booting"]`); the first step after the boot starts the next episode with its
+    observation, so a vectorized loop can keep calling `add_batch` through a restart.
+
+    Args:
+        capacity (int): Transitions kept.
+        frame_shape (tuple): Shape of one frame, e.g. `(348, 640, 4)`, or `(6, 32, 32)` for the minimap.
+        stack (int): Frames per observation.
+        num_envs (int): Instances adding transitions concurrently.
+        frames (int): Uncompressed frames kept, defaults to enough for `capacity` transitions (plus episode starts).
+        compressed_frames (int): Frames kept compressed after those, 0 to drop them.
+        compress_level (int): zlib level of the compressed tier.
+        seed (int): Seed of the sampler.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        frame_shape: tuple,
+        stack=4,
+        num_envs=1,
+        frames=None,
+        compressed_frames=0,
+        compress_level=1,
+        seed=None,
+    ):
+        self.capacity = capacity
+        self.frame_shape = tuple(frame_shape)
+        self.stack = stack
+        self.num_envs = num_envs
+        self.hot_capacity = capacity + capacity // 64 + num_envs if frames is None else frames
+        self.cold_capacity = compressed_frames
+        self.compress_level = compress_level
+        self.rng = np.random.default_rng(seed)
+
+        self.frames = np.zeros((self.hot_capacity, *self.frame_shape), np.uint8)
+        self.compressed = [None] * self.cold_capacity
+        self.compressed_bytes = 0
+        self.frame_count = 0  # frames ever added, a frame's number is its position in that sequence
+
+        self.obs_frames = np.zeros((capacity, stack), np.int64)
+        self.next_frames = np.zeros(capacity, np.int64)
+        self.rewards = np.zeros(capacity, np.float32)
+        self.dones = np.zeros(capacity, bool)
+        self.actions = None  # allocated on the first `add`, from the action's shape and dtype
+        self.count = 0  # transitions ever added
+
+        self.history = [None] * num_envs  # numbers of the current stack of each instance, None between episodes
+        self.restarting = [False] * num_envs  # whether the instance's next booted step starts an episode
+
+    @property
+    def kept_frames(self) -> int:
+        return self.hot_capacity + self.cold_capacity
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def store_frame(self, obs) -> int:
+        """Add a frame, moving the one it replaces to the compressed tier. Returns its number."""
+        number = self.frame_count
+        slot = number % self.hot_capacity
+        if self.cold_capacity and number >= self.hot_capacity:
+            evicted = (number - self.hot_capacity) % self.cold_capacity
+            if self.compressed[evicted] is not None:
+                self.compressed_bytes -= len(self.compressed[evicted])
+            self.compressed[evicted] = zlib.compress(self.frames[slot].tobytes(), self.compress_level)
+            self.compressed_bytes += len(self.compressed[evicted])
+        self.frames[slot] = frame_array(obs).reshape(self.frame_shape)
+        self.frame_count += 1
+        return number
+
+    def start(self, obs, env=0):
+        """Begin an episode of instance `env` with its first observation."""
+        self.restarting[env] = False
+        self.history[env] = [self.store_frame(obs)] * self.stack
+
+    def add(self, action, reward: float, next_obs, done: bool, info: dict | None = None, env=0) -> bool:
+        """
+        Record a step of instance `env`: `action` (the policy's output, array-like) taken on the
+        current stack led to `next_obs` and `reward`. Returns False if the step was not stored.
+        """
+        info = {} if info is None else info
+        if info.get("booting"):
+            return False
+        history = self.history[env]
+        if history is None:
+            if not self.restarting[env]:
+                raise RuntimeError(f"No episode in progress on instance {env}, call start() after a reset")
+            self.restarting[env] = False
+            self.start(next_obs, env)
+            return False
+        if info.get("restarted"):
+            self.history[env] = None
+            self.restarting[env] = True
+            return False
+
+        action = np.asarray(action)
+        if self.actions is None:
+            self.actions = np.zeros((self.capacity, *action.shape), action.dtype)
+        next_frame = self.store_frame(next_obs)
+        slot = self.count % self.capacity
+        self.obs_frames[slot] = history
+        self.next_frames[slot] = next_frame
+        self.actions[slot] = action
+        self.rewards[slot] = reward
+        self.dones[slot] = done and not info.get("TimeLimit.truncated", False)
+        self.count += 1
+        self.history[env] = None if done else [*history[1:], next_frame]
+        return True
+
+    def add_batch(self, actions, rewards, next_obs, dones, infos):
+        """`add` for every instance of an `MKWiiVecEnv.step` result."""
+        for env in range(self.num_envs):
+            self.add(actions[env], rewards[env], next_obs[env], dones[env], infos[env], env)
+
+    def gather(self, numbers: np.ndarray) -> np.ndarray:
+        """Frames `numbers` (any shape) as an array of shape `numbers.shape + frame_shape`."""
+        out = np.empty((*numbers.shape, *self.frame_shape), np.uint8)
+        hot = numbers >= self.frame_count - self.hot_capacity
+        out[hot] = self.frames[numbers[hot] % self.hot_capacity]
+        if not hot.all():
+            unique, inverse = np.unique(numbers[~hot], return_inverse=True)
+            decoded = np.empty((len(unique), *self.frame_shape), np.uint8)
+            for i, number in enumerate(unique):
+                data = zlib.decompress(self.compressed[number % self.cold_capacity])
+                decoded[i] = np.frombuffer(data, np.uint8).reshape(self.frame_shape)
+            out[~hot] = decoded[inverse.reshape(-1)]
+        return out
+
+    def sample(self, batch_size: int) -> dict[str, np.ndarray]:
+        """
+        Returns:
+            {"obs": (B, stack, *frame_shape), "actions", "rewards", "next_obs": (B, stack, *frame_shape), "dones"}
+        """
+        if not len(self):
+            raise ValueError("Cannot sample from an empty replay buffer, add transitions first")
+        oldest = self.frame_count - self.kept_frames
+        first = self.count - len(self)
+        # Transitions are added in order, but one can reference frames older than an earlier one's
+        # (long episodes on another instance), so stale draws are redrawn rather than excluded upfront.
+        numbers = self.rng.integers(first, self.count, batch_size)
+        for _ in range(8):
+            stale = self.obs_frames[numbers % self.capacity, 0] < oldest
+            if not stale.any():
+                break
+            numbers[stale] = self.rng.integers(first, self.count, stale.sum())
+        slots = numbers % self.capacity
+        if stale.any():
+            valid = np.flatnonzero(self.obs_frames[: len(self), 0] >= oldest)
+            if not len(valid):
+                raise ValueError("No transition has all its frames kept")
+            slots = self.rng.choice(valid, batch_size)
+
+        obs_frames = self.obs_frames[slots]
+        next_frames = np.concatenate([obs_frames[:, 1:], self.next_frames[slots, None]], axis=1)
+        stacks = self.gather(np.concatenate([obs_frames, next_frames]))
+        return {
+            "obs": stacks[:batch_size],
+            "actions": self.actions[slots],
+            "rewards": self.rewards[slots],
+            "next_obs": stacks[batch_size:],
+            "dones": self.dones[slots],
+        }
+
+    def nbytes(self) -> int:
+        """Memory held by the buffer, counting only the compressed size of the compressed tier."""
+        actions = 0 if self.actions is None else self.actions.nbytes
+        transitions = self.obs_frames.nbytes + self.next_frames.nbytes + self.rewards.nbytes + self.dones.nbytes
+        return self.frames.nbytes + self.compressed_bytes + transitions + actions
+
+    def stats(self) -> dict:
+        frame_bytes = int(np.prod(self.frame_shape))
+        compressed = min(max(self.frame_count - self.hot_capacity, 0), self.cold_capacity)
+        return {
+            "transitions": len(self),
+            "frames": min(self.frame_count, self.hot_capacity),
+            "compressed_frames": compressed,
+            "compression_ratio": compressed * frame_bytes / self.compressed_bytes if self.compressed_bytes else None,
+            "bytes": self.nbytes(),
+            # Against a buffer storing both stacks of every transition.
+            "naive_bytes": len(self) * 2 * self.stack * frame_bytes,
+        }
@@ -0,0 +1,43 @@
+import weakref
+
+import shm
+
+
+class Savestate:
+    """
+    Handle to an emulator savestate blob held in shared memory, produced by `MKWiiEnv.snapshot()`.
+
+    The blob never goes through the pickle pipe: the script writes it into a segment and the client
+    takes ownership. A handle can be restored into any instance running the same game, any number of
+    times, until `release()` frees the segment. A handle that is garbage-collected (or still alive at
+    interpreter exit) frees it too, so drop every reference only once no restore is pending.
+
+    The segment holds the `size`-byte savestate followed by the frame drawn last, `frame` being its
+    `(width, height, size)`, which a restore puts back along with the frame counter.
+    """
+
+    def __init__(self, name: str, size: int, frame_count: int, frame=(None, None, 0)):
+        self.shm = shm.attach(name, owned=True)
+        self.name = name
+        self.size = size
+        self.frame_count = frame_count
+        self.frame = frame
+        self.finalizer = weakref.finalize(self, free_segment, self.shm)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.shm.buf[: self.size])
+
+    def release(self):
+        self.finalizer()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def free_segment(segment):
+    segment.close()
+    segment.unlink()
@@ -0,0 +1,106 @@
+import collections
+from typing import NamedTuple
+
+from enums import Character, Track, Vehicles
+
+
+class EpisodeConfig(NamedTuple):
+    track: Track
+    character: Character
+    vehicle: Vehicles
+
+
+class EpisodeScheduler:
+    """
+    Decides which episode configuration each instance of a pool runs next, so the collected data
+    follows target weights even though episode lengths differ by course, and no instance waits for
+    another: instances pull their next episode from the shared schedule the moment they finish one.
+
+    Weights are shares of samples (frames), not of episodes. A configuration's standing counts the
+    samples collected plus, for the episodes still running, its mean episode length so far; the next
+    episode goes to the configuration furthest below its share. Among configurations within
+    `warm_slack` mean episodes of that deficit, one the instance ran recently (its savestate and
+    course data are still in the instance's caches) is preferred.
+
+    Args:
+        weights (dict): `{EpisodeConfig: weight}`, normalized to shares.
+        warm_states (int): Configurations remembered as warm per instance.
+        warm_slack (float): Deficit, in mean episodes, traded for running a warm configuration.
+        prior_length (float): Assumed episode length, in frames, before a configuration has finished one.
+    """
+
+    def __init__(self, weights: dict[EpisodeConfig, float], warm_states=2, warm_slack=0.5, prior_length=1000.0):
+        total = sum(weights.values())
+        self.weights = {config: weight / total for config, weight in weights.items()}
+        self.warm_states = warm_states
+        self.warm_slack = warm_slack
+        self.prior_length = prior_length
+        self.samples = {config: 0 for config in self.weights}
+        self.episodes = {config: 0 for config in self.weights}
+        self.running = {}  # instance -> configuration of its current episode
+        self.warm = collections.defaultdict(collections.OrderedDict)  # instance -> recent configurations
+        self.warm_picks = 0
+
+    def mean_length(self, config: EpisodeConfig) -> float:
+        if not self.episodes[config]:
+            return self.prior_length
+        return self.samples[config] / self.episodes[config]
+
+    def deficits(self) -> dict[EpisodeConfig, float]:
+        """Samples each configuration lacks to reach its share, counting running episodes as done."""
+        expected = dict(self.samples)
+        for config in self.running.values():
+            expected[config] += self.mean_length(config)
+        total = sum(expected.values())
+        return {config: self.weights[config] * total - expected[config] for config in self.weights}
+
+    def next(self, instance) -> EpisodeConfig:
+        """Start the next episode on `instance`, ending the one it was running without a count."""
+        self.running.pop(instance, None)
+        deficits = self.deficits()
+        best = max(deficits, key=deficits.get)
+        warm = self.warm[instance]
+        candidates = [
+            config
+            for config in warm
+            if deficits[config] >= deficits[best] - self.warm_slack * self.mean_length(best)
+        ]
+        if candidates:
+            config = max(candidates, key=deficits.get)
+            self.warm_picks += 1
+        else:
+            config = best
+        self.running[instance] = config
+        warm[config] = True
+        warm.move_to_end(config)
+        while len(warm) > self.warm_states:
+            warm.popitem(last=False)
+        return config
+
+    def finish(self, instance, samples: int) -> EpisodeConfig:
+        """Record the episode `instance` was running as done after `samples` frames."""
+        config = self.running.pop(instance)
+        self.samples[config] += samples
+        self.episodes[config] += 1
+        return config
+
+    def cancel(self, instance) -> EpisodeConfig | None:
+        """Drop the episode of `instance` uncounted, e.g. after a crash, which also cools its caches."""
+        config = self.running.pop(instance, None)
+        self.warm.pop(instance, None)
+        return config
+
+    def mix(self) -> dict[EpisodeConfig, float]:
+        """Share of the samples collected so far per configuration."""
+        total = sum(self.samples.values())
+        return {config: samples / total if total else 0.0 for config, samples in self.samples.items()}
+
+    def stats(self) -> dict:
+        episodes = sum(self.episodes.values())
+        return {
+            "samples": sum(self.samples.values()),
+            "episodes": episodes,
+            "warm_picks": self.warm_picks,
+            # Largest gap between a configuration's share of the samples and its target.
+            "mix_error": max(abs(share - self.weights[config]) for config, share in self.mix().items()),
+        }
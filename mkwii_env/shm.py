@@ -0,0 +1,27 @@
+from multiprocessing import resource_tracker, shared_memory
+
+
+def create(size: int, owned=True) -> shared_memory.SharedMemory:
+    """
+    Create a shared memory segment. With `owned=False` the segment is handed over to another process,
+    which attaches to it by name and becomes responsible for unlinking it.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    if not owned:
+        untrack(shm)
+    return shm
+
+
+def attach(name: str, owned=False) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing segment. Unless `owned`, this process will not unlink it at exit (before
+    Python 3.13 every attach registers the segment with the resource tracker, which unlinks it).
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    if not owned:
+        untrack(shm)
+    return shm
+
+
+def untrack(shm: shared_memory.SharedMemory) -> None:
+    resource_tracker.unregister(shm._name, "shared_memory")
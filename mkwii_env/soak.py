@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from mkwii_env import MKWiiEnv
+from actions import GCAction
+
+
+FAKE_DOLPHIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_dolphin")
+
+# Failure thresholds, compared between the start of the run after warm-up and its end.
+THRESHOLDS = {
+    "rss_growth_mb": 64.0,  # client + emulator resident memory
+    "traced_growth_mb": 16.0,  # Python allocations of the client
+    "fd_growth": 8,  # open file descriptors of the client + emulator
+    "throughput_drop": 0.2,  # fraction of the post-warm-up steps/sec lost
+}
+
+
+def rss_bytes(pid="self") -> int:
+    with open(f"/proc/{pid}/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def open_fds(pid="self") -> int:
+    return len(os.listdir(f"/proc/{pid}/fd"))
+
+
+class SoakTest:
+    """
+    Drives one `MKWiiEnv` for a long time, stepping with varying actions and resetting every
+    `reset_every` steps, and samples every `sample_every` steps:
+    - resident memory of the client and of the emulator process;
+    - Python memory traced by `tracemalloc`, and its top allocators (by line) relative to the warm-up;
+    - open file descriptors of both processes (leaked FIFOs or shared memory show up here);
+    - steps/sec over the interval (time spent in `step`), and the mean reset time.
+
+    `report()` compares the first sample after `warmup` steps with the last one against `thresholds`
+    (see `THRESHOLDS`), throughput as the mean of the first and last quarter of those samples, and
+    returns a JSON-serializable dict whose "ok" is False if any check failed.
+
+    Args:
+        dolphin_config (dict): Passed to `MKWiiEnv`. `DOLPHIN_PATH` may point at `fake_dolphin/` to test the client and script without the emulator.
+        steps (int): Total steps.
+        reset_every (int): Steps between resets (0: never).
+        sample_every (int): Steps between samples.
+        warmup (int): Steps before the baseline sample, so caches and pools reach their steady size.
+        top_allocators (int): Allocators listed in each sample.
+    """
+
+    def __init__(
+        self,
+        dolphin_config: dict,
+        steps=1_000_000,
+        reset_every=10_000,
+        sample_every=5_000,
+        warmup=5_000,
+        thresholds=None,
+        top_allocators=10,
+    ):
+        self.dolphin_config = dolphin_config
+        self.steps = steps
+        self.reset_every = reset_every
+        self.sample_every = sample_every
+        self.warmup = warmup
+        self.thresholds = {**THRESHOLDS, **(thresholds or {})}
+        self.top_allocators = top_allocators
+        self.samples = []
+        self.baseline = None  # index of the first sample after warm-up
+        self.baseline_snapshot = None
+
+    def sample(self, env: MKWiiEnv, step: int, resets: int, interval_steps: int, interval_time: float) -> dict:
+        emulator_pid = env.dolphin.dolphin.pid if env.dolphin.is_running() else None
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                # The samples kept by this harness.
+                tracemalloc.Filter(False, __file__),
+            ]
+        )
+        if self.baseline_snapshot is None and step >= self.warmup:
+            self.baseline = len(self.samples)
+            self.baseline_snapshot = snapshot
+        top = []
+        if self.baseline_snapshot is not None:
+            for stat in snapshot.compare_to(self.baseline_snapshot, "lineno")[: self.top_allocators]:
+                frame = stat.traceback[0]
+                top.append({"where": f"{frame.filename}:{frame.lineno}", "size": stat.size, "size_diff": stat.size_diff, "count_diff": stat.count_diff})
+        sample = {
+            "time": time.time(),
+            "step": step,
+            "resets": resets,
+            "restarts": env.dolphin.restarts,
+            "client_rss": rss_bytes(),
+            "emulator_rss": rss_bytes(emulator_pid) if emulator_pid is not None else None,
+            "traced": traced,
+            "traced_peak": traced_peak,
+            "client_fds": open_fds(),
+            "emulator_fds": open_fds(emulator_pid) if emulator_pid is not None else None,
+            "steps_per_sec": interval_steps / max(interval_time, 1e-9),
+            "top_allocators": top,
+        }
+        self.samples.append(sample)
+        return sample
+
+    def run(self, log=print) -> dict:
+        tracemalloc.start()
+        env = MKWiiEnv(dolphin_config=self.dolphin_config)
+        rng = np.random.default_rng(0)
+        action = GCAction()
+        resets = 0
+        interval_steps = 0
+        interval_time = 0.0  # spent in `step`, resets are timed separately
+        reset_time = 0.0
+        try:
+            for step in range(1, self.steps + 1):
+                action.set_Stick("Stick", float(rng.uniform(-1, 1)), 0.0)
+                if step % 8 == 0:
+                    action["A"] = not action["A"]
+                start = time.perf_counter()
+                env.step(action)
+                interval_time += time.perf_counter() - start
+                interval_steps += 1
+                if self.reset_every and step % self.reset_every == 0:
+                    start = time.perf_counter()
+                    env.reset()
+                    reset_time += time.perf_counter() - start
+                    resets += 1
+                if step % self.sample_every == 0 or step == self.steps:
+                    sample = self.sample(env, step, resets, interval_steps, interval_time)
+                    sample["reset_time"] = reset_time / max(resets, 1)
+                    log(
+                        f"step {step}: {sample['steps_per_sec']:.0f} steps/s, "
+                        f"rss {sample['client_rss'] / 2**20:.1f} + {(sample['emulator_rss'] or 0) / 2**20:.1f} MB, "
+                        f"traced {sample['traced'] / 2**20:.1f} MB, fds {sample['client_fds']} + {sample['emulator_fds']}"
+                    )
+                    interval_steps = 0
+                    interval_time = 0.0
+        finally:
+            env.close()
+            tracemalloc.stop()
+        return self.report()
+
+    def report(self) -> dict:
+        checks = {}
+        if self.baseline is not None and len(self.samples) > self.baseline + 1:
+            samples = self.samples[self.baseline :]
+            first, last = samples[0], samples[-1]
+            window = max(1, len(samples) // 4)
+            throughput = [np.mean([sample["steps_per_sec"] for sample in part]) for part in (samples[:window], samples[-window:])]
+            measured = {
+                "rss_growth_mb": (last["client_rss"] + (last["emulator_rss"] or 0) - first["client_rss"] - (first["emulator_rss"] or 0)) / 2**20,
+                "traced_growth_mb": (last["traced"] - first["traced"]) / 2**20,
+                "fd_growth": last["client_fds"] + (last["emulator_fds"] or 0) - first["client_fds"] - (first["emulator_fds"] or 0),
+                "throughput_drop": float(1 - throughput[1] / max(throughput[0], 1e-9)),
+            }
+            for name, value in measured.items():
+                checks[name] = {"value": value, "threshold": self.thresholds[name], "ok": value <= self.thresholds[name]}
+        return {
+            "config": {
+                "steps": self.steps,
+                "reset_every": self.reset_every,
+                "sample_every": self.sample_every,
+                "warmup": self.warmup,
+                "dolphin_path": self.dolphin_config["DOLPHIN_PATH"],
+            },
+            "checks": checks,
+            # Too short a run to compare anything is not a pass.
+            "ok": bool(checks) and all(check["ok"] for check in checks.values()),
+            "samples": self.samples,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak-test MKWiiEnv for memory growth, fd leaks and throughput drift.")
+    parser.add_argument("--dolphin-path", default=FAKE_DOLPHIN_PATH, help="Defaults to the fake backend in fake_dolphin/")
+    parser.add_argument("--script-path", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "mkwii_scripts", "dolphin_script.py"))
+    parser.add_argument("--iso-path", default="")
+    parser.add_argument("--pipe-path", default=None, help="Defaults to a temporary directory")
+    parser.add_argument("--dolphin-id", default="soak")
+    parser.add_argument("--steps", type=int, default=1_000_000)
+    parser.add_argument("--reset-every", type=int, default=10_000)
+    parser.add_argument("--sample-every", type=int, default=5_000)
+    parser.add_argument("--warmup", type=int, default=5_000)
+    for name, value in THRESHOLDS.items():
+        parser.add_argument(f"--max-{name.replace('_', '-')}", dest=name, type=type(value), default=value)
+    parser.add_argument("--report", default="soak_report.json")
+    args = parser.parse_args()
+
+    # The script finds this package through MKWII_ENV_PATH.
+    os.environ.setdefault("MKWII_ENV_PATH", os.path.dirname(os.path.abspath(__file__)))
+    soak_test = SoakTest(
+        {
+            "DOLPHIN_PATH": args.dolphin_path,
+            "DOLPHIN_ID": args.dolphin_id,
+            "SCRIPT_PATH": args.script_path,
+            "ISO_PATH": args.iso_path,
+            "PIPE_PATH": args.pipe_path or tempfile.mkdtemp(prefix="mkwii_soak_"),
+        },
+        steps=args.steps,
+        reset_every=args.reset_every,
+        sample_every=args.sample_every,
+        warmup=args.warmup,
+        thresholds={name: getattr(args, name) for name in THRESHOLDS},
+    )
+    report = soak_test.run()
+    with open(args.report, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    for name, check in report["checks"].items():
+        print(f"{'ok  ' if check['ok'] else 'FAIL'} {name}: {check['value']:.3f} (max {check['threshold']})")
+    print(f"Report written to {args.report}")
+    sys.exit(0 if report["ok"] else 1)
@@ -0,0 +1,118 @@
+import configparser
+import copy
+import os
+
+
+# Throughput-critical Dolphin settings, as {ini file: {section: {key: value}}}. Profiles are
+# versioned: change a profile by adding a new name, so existing user directories are regenerated
+# instead of silently drifting.
+HEADLESS_V1 = {
+    "Dolphin.ini": {
+        "Core": {
+            "GFXBackend": "Vulkan",
+            "EmulationSpeed": "0.0",  # uncapped
+            "DSPHLE": "True",
+            "Fastmem": "True",
+        },
+        "DSP": {
+            "Backend": "No Audio Output",
+            "Volume": "0",
+            "DumpAudio": "False",
+        },
+        "Interface": {
+            "ConfirmStop": "False",
+            "OnScreenDisplayMessages": "False",
+            "UsePanicHandlers": "False",
+        },
+        "Display": {
+            "Fullscreen": "False",
+            "RenderToMain": "False",
+            "RenderWindowAutoSize": "False",
+        },
+        "Analytics": {
+            "Enabled": "False",
+            "PermissionAsked": "True",
+        },
+        "AutoUpdate": {
+            "UpdateTrack": "",
+        },
+    },
+    "GFX.ini": {
+        "Settings": {
+            "InternalResolution": "1",  # native, the lowest Dolphin renders at
+            "InternalResolutionFrameDumps": "False",  # frames come out at the window size below
+            "ShaderCompilationMode": "2",  # asynchronous ubershaders
+            "WaitForShadersBeforeStarting": "False",
+            "ShowFPS": "False",
+            "MSAA": "1",
+            "SSAA": "False",
+        },
+        "Hardware": {
+            "VSync": "False",
+        },
+        "Enhancements": {
+            "MaxAnisotropy": "0",
+            "PostProcessingShader": "",
+        },
+    },
+}
+
+
+def derive(profile: dict, changes: dict) -> dict:
+    derived = copy.deepcopy(profile)
+    for ini_file, sections in changes.items():
+        for section, values in sections.items():
+            derived.setdefault(ini_file, {}).setdefault(section, {}).update(values)
+    return derived
+
+
+PROFILES = {
+    "headless-v1": HEADLESS_V1,
+    # No GPU on the host.
+    "headless-software-v1": derive(HEADLESS_V1, {"Dolphin.ini": {"Core": {"GFXBackend": "Software Renderer"}}}),
+    # Nothing is rendered, `event.framedrawn()` carries no image: only for RAM-state observations.
+    "ram-only-v1": derive(HEADLESS_V1, {"Dolphin.ini": {"Core": {"GFXBackend": "Null"}}}),
+}
+
+PROFILE_STAMP = ".mkwii_profile"
+
+
+def write_user_config(user_dir: str, profile="headless-v1", width=640, height=348, force=False) -> bool:
+    """
+    Write `profile` into `user_dir/Config`, merging with any settings already there.
+
+    The window size is set to the requested observation size so frames come out at that size. A stamp
+    file records the profile and size, and the directory is only rewritten when they change (or with
+    `force`). Returns whether anything was written.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Invalid Dolphin config profile: {profile}")
+    stamp = f"{profile} {width}x{height}"
+    stamp_path = os.path.join(user_dir, PROFILE_STAMP)
+    if not force and os.path.exists(stamp_path):
+        with open(stamp_path, "r") as f:
+            if f.read().strip() == stamp:
+                return False
+
+    settings = derive(
+        PROFILES[profile],
+        {"Dolphin.ini": {"Display": {"RenderWindowWidth": str(width), "RenderWindowHeight": str(height)}}},
+    )
+    config_dir = os.path.join(user_dir, "Config")
+    os.makedirs(config_dir, exist_ok=True)
+    for ini_file, sections in settings.items():
+        path = os.path.join(config_dir, ini_file)
+        ini = configparser.ConfigParser(interpolation=None)
+        ini.optionxform = str  # Dolphin keys are case sensitive
+        ini.read(path)
+        for section, values in sections.items():
+            if not ini.has_section(section):
+                ini.add_section(section)
+            for key, value in values.items():
+                ini.set(section, key, value)
+        with open(path, "w") as f:
+            ini.write(f, space_around_delimiters=True)
+
+    with open(stamp_path, "w") as f:
+        f.write(stamp + "\n")
+    return True
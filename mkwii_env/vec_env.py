@@ -0,0 +1,413 @@
+import collections
+import time
+
+import yaml
+
+from actions import GCAction, WiiClassicAction, WiimoteAction, WiiNunchukAction, GBAAction
+from mkwii_env import MKWiiEnv
+from launch import LaunchProfile
+from savestate import Savestate
+from batch_buffer import BatchBuffer, write_frame
+from pipe_manager import PipeTimeoutError, PipeClosedError, ProtocolError
+from multiplexer import DolphinMultiplexer
+from scheduler import EpisodeConfig, EpisodeScheduler
+
+
+class MKWiiVecEnv:
+    """
+    A batch of `MKWiiEnv`s, one per entry in `DOLPHIN_IDS`.
+
+    Each instance has its own watchdog: when one emulator crashes or hangs, only that instance is
+    relaunched and reports a truncated episode, the others keep their episodes. The relaunch does not
+    wait for the boot; until it completes, the instance's steps return `info["booting"]` (see
+    `MKWiiEnv.step`) while the others keep stepping.
+
+    `from_config` places each instance according to the `LAUNCH` defaults and per-instance
+    `INSTANCES` entries of `dolphin_config.yaml`.
+
+    After `enable_batch_buffer`, observations are written by the emulators straight into one shared
+    `(N, H, W, C)` array (see `BatchBuffer`) instead of coming back as N pickled frames.
+
+    `enable_pipelining` switches to one-step-latency stepping, see `MKWiiEnv.enable_pipelining`.
+    """
+
+    BOOT_POLL_INTERVAL = 0.05
+
+    def __init__(self, dolphin_configs: list[dict]):
+        self.envs = [MKWiiEnv(dolphin_config=dolphin_config) for dolphin_config in dolphin_configs]
+        self.num_envs = len(self.envs)
+        self.batch = None
+        self.buffer_index = 0
+        self.pipelined = False
+        self.in_flight = None  # per instance, whether the pipelined batch step was sent
+        self.batch_pending = None  # (dones, infos) of the in-flight batch step, collected by `drain`
+
+    @classmethod
+    def from_config(cls, config_path="dolphin_config.yaml"):
+        config = yaml.safe_load(open(config_path, "r"))
+        return cls([cls.dolphin_config(config, dolphin_id) for dolphin_id in config["DOLPHIN_IDS"]])
+
+    @staticmethod
+    def dolphin_config(config: dict, dolphin_id) -> dict:
+        """`Dolphin` keyword arguments of instance `dolphin_id` of a loaded `dolphin_config.yaml`."""
+        return {
+            "DOLPHIN_PATH": config["DOLPHIN_PATH"],
+            "DOLPHIN_ID": dolphin_id,
+            "SCRIPT_PATH": config["SCRIPT_PATH"],
+            "ISO_PATH": config["ISO_PATH"],
+            "PIPE_PATH": config["PIPE_PATH"],
+            "LAUNCH": LaunchProfile.from_config(config, dolphin_id),
+            "RAM_OBSERVATION": config.get("RAM_OBSERVATION"),
+        }
+
+    def add_instance(self, dolphin_config: dict) -> int:
+        """
+        Launch one more instance, in the current stepping mode, and wait for it to boot. Returns its
+        index. Not available with the batch buffer, which is sized for the instances it was enabled with.
+        """
+        self.check_resizable()
+        return self.add_env(MKWiiEnv(dolphin_config=dolphin_config))
+
+    def add_env(self, env: MKWiiEnv) -> int:
+        """`add_instance` for an instance booted by the caller, e.g. in a background thread."""
+        self.check_resizable()
+        self.discard()
+        if self.pipelined:
+            env.enable_pipelining()
+        self.envs.append(env)
+        self.num_envs += 1
+        return self.num_envs - 1
+
+    def remove_instance(self, index=-1):
+        """Close one instance; the following ones shift down by one index."""
+        self.check_resizable()
+        self.discard()
+        self.envs.pop(index).close()
+        self.num_envs -= 1
+
+    def check_resizable(self):
+        if self.batch is not None:
+            raise RuntimeError("The batch buffer is sized for a fixed number of instances")
+
+    def step(
+        self,
+        actions: list[GCAction | WiiClassicAction | WiimoteAction | WiiNunchukAction | GBAAction | dict],
+    ):
+        """
+        Args:
+            actions (list): One action per instance, as accepted by `MKWiiEnv.step`.
+
+        Returns:
+            Lists of observations, rewards, dones and infos, indexed like `self.envs`.
+        """
+        if self.batch is not None:
+            if self.pipelined:
+                return self.step_batch_pipelined(actions)
+            return self.step_batch(actions)
+        results = [env.step(action) for env, action in zip(self.envs, actions)]
+        obs, rewards, dones, infos = zip(*results)
+        return list(obs), list(rewards), list(dones), list(infos)
+
+    def enable_batch_buffer(self, height=348, width=640, channels=4):
+        self.batch = BatchBuffer(self.num_envs, height, width, channels)
+        self.buffer_index = 0
+        for i, env in enumerate(self.envs):
+            env.discard()
+            env.dolphin.set_frame_buffer(self.batch.spec(i))
+
+    def enable_pipelining(self):
+        """
+        Every `step` sends the new actions and returns the observations produced by the previous ones,
+        so all instances emulate while the policy runs (see `MKWiiEnv.enable_pipelining` for timing).
+        With the batch buffer, the returned frames are the half the previous actions were written to;
+        they stay valid until the next `step`, which sends its actions into that half.
+        """
+        self.pipelined = True
+        for env in self.envs:
+            env.enable_pipelining()
+
+    def disable_pipelining(self):
+        """Leave pipelined mode, returning the results of the steps that were still in flight."""
+        if self.batch is not None:
+            self.drain()
+            self.pipelined = False
+            for env in self.envs:
+                env.disable_pipelining()
+            if self.batch_pending is None:
+                return None
+            dones, infos = self.batch_pending
+            self.batch_pending = None
+            return self.batch.frames[1 - self.buffer_index], [0] * self.num_envs, dones, infos
+        self.pipelined = False
+        return [env.disable_pipelining() for env in self.envs]
+
+    def drain(self):
+        """Finish the pipelined batch step in flight, keeping its result for the next `step`."""
+        if self.in_flight is not None:
+            self.batch_pending = self.wait_batch(self.in_flight)
+            self.in_flight = None
+
+    def discard(self):
+        """Finish every step in flight and drop the results."""
+        self.drain()
+        self.batch_pending = None
+        for env in self.envs:
+            env.discard()
+
+    def step_batch(self, actions):
+        """
+        Step every instance into the current half of the batch buffer. All actions are sent before any
+        reply is awaited, so the instances emulate in parallel.
+
+        Returns:
+            The `(N, H, W, C)` frames view (valid until the step after next, when its half is reused),
+            rewards, dones and infos. `self.batch.frame_count`/`skipped_frames`/`sizes` hold the matching
+            per-instance state under the same buffer index.
+        """
+        buffer_index = self.buffer_index
+        dones, infos = self.wait_batch(self.send_batch(actions, buffer_index))
+        self.buffer_index = 1 - buffer_index
+        return self.batch.frames[buffer_index], [0] * self.num_envs, dones, infos
+
+    def step_batch_pipelined(self, actions):
+        """
+        `step_batch` with one step of latency: wait for the actions sent by the previous call, send
+        `actions` into the other half of the buffer, and return the half that was just completed.
+        """
+        previous = 1 - self.buffer_index
+        if self.batch_pending is not None:
+            dones, infos = self.batch_pending
+            self.batch_pending = None
+        elif self.in_flight is not None:
+            dones, infos = self.wait_batch(self.in_flight)
+        else:
+            # Nothing in flight yet: answer with the frames the actions are applied to.
+            dones, infos = [False] * self.num_envs, [{} for _ in range(self.num_envs)]
+            for i, env in enumerate(self.envs):
+                if env.ready():
+                    write_frame(self.batch.frames[previous, i], self.batch.sizes[previous, i], env.dolphin.get_frame())
+        self.in_flight = self.send_batch(actions, self.buffer_index)
+        self.buffer_index = previous
+        return self.batch.frames[previous], [0] * self.num_envs, dones, infos
+
+    def send_batch(self, actions, buffer_index: int) -> list[bool | None]:
+        """Send every action without waiting. Returns which instances took theirs, None for those booting."""
+        sent = []
+        for env, action in zip(self.envs, actions):
+            if not env.ready():
+                sent.append(None)
+                continue
+            try:
+                env.dolphin.send_step(action, buffer_index)
+                sent.append(True)
+            except (PipeTimeoutError, PipeClosedError):
+                sent.append(False)
+        return sent
+
+    def wait_batch(self, sent: list[bool | None]) -> tuple[list[bool], list[dict]]:
+        """Wait for the steps sent by `send_batch`, relaunching the instances that failed without waiting for them."""
+        dones = [False] * self.num_envs
+        infos = [{} for _ in range(self.num_envs)]
+        for i, env in enumerate(self.envs):
+            if sent[i] is None:
+                infos[i] = {"booting": True}
+                continue
+            try:
+                if not sent[i]:
+                    raise PipeClosedError(f"Dolphin {env.dolphin.DOLPHIN_ID} did not take its action")
+                infos[i] = env.dolphin.wait_step()
+            except (PipeTimeoutError, PipeClosedError) as e:
+                _, _, dones[i], infos[i] = env.failed(e)
+        return dones, infos
+
+    def reset(self):
+        self.in_flight = None
+        self.batch_pending = None
+        return [env.reset() for env in self.envs]
+
+    def broadcast_restore(self, state: Savestate, indices: list[int] | None = None):
+        """
+        Load one snapshot into many instances, so each can roll out a different action sequence from
+        the same frame. The restores are issued to every instance before any is waited on, so they
+        load in parallel.
+        """
+        indices = range(self.num_envs) if indices is None else indices
+        self.discard()
+        for i in indices:
+            self.envs[i].dolphin.send_restore(state)
+        for i in indices:
+            self.envs[i].dolphin.wait_restore()
+
+    def reload(self, modules=()) -> list[str]:
+        """Hot-reload the script-side code of every instance at once, see `Dolphin.reload`."""
+        self.discard()
+        for env in self.envs:
+            env.dolphin.send_reload(modules)
+        reloaded, errors = [], []
+        # Every reply is read before raising, so no instance is left with an unread one.
+        for env in self.envs:
+            try:
+                reloaded = env.dolphin.wait_reload()
+            except ProtocolError as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        return reloaded
+
+    def run_requests(self, multiplexer: DolphinMultiplexer, submit, complete):
+        """
+        Drive `multiplexer` until no instance has work left: `submit(i)` gives instance `i` its next
+        request, if any, and `complete(i, reply, error)` takes every completion. An instance that
+        crashes or times out is relaunched in the background and submitted to again once it is up,
+        while the others keep going; one that does not come back is killed and left out.
+        """
+        booting = set()
+        for i in range(self.num_envs):
+            submit(i)
+        while multiplexer.requests or booting:
+            timeout = self.BOOT_POLL_INTERVAL if booting else None
+            if multiplexer.requests:
+                completed = multiplexer.poll(timeout)
+            else:
+                time.sleep(timeout)
+                completed = []
+            for i, reply, error in completed:
+                complete(i, reply, error)
+                if error is None:
+                    submit(i)
+                else:
+                    print(f"Dolphin {self.envs[i].dolphin.DOLPHIN_ID} failed ({error}), restarting.")
+                    self.envs[i].dolphin.restart(wait=False)
+                    booting.add(i)
+            for i in list(booting):
+                dolphin = self.envs[i].dolphin
+                try:
+                    ready = dolphin.poll_ready()
+                except (PipeTimeoutError, PipeClosedError) as e:
+                    print(f"Dolphin {dolphin.DOLPHIN_ID} did not come back ({e}), leaving it out.")
+                    dolphin.kill()
+                    booting.discard(i)
+                    continue
+                if ready:
+                    booting.discard(i)
+                    submit(i)
+
+    def evaluate_policies(self, policies: list[dict], timeout=None, retries=1, **evaluation) -> list[dict]:
+        """
+        Evaluate many policies (e.g. every checkpoint of a run) inside the emulators, see
+        `MKWiiEnv.evaluate_policy` for the `evaluation` options. Each instance takes the next policy as
+        soon as it is done with the previous one. An instance that crashes or exceeds `timeout` is
+        restarted without holding up the others (see `run_requests`) and its policy retried up to
+        `retries` times, then reported as `{"error": ...}`.
+
+        Returns:
+            One result per policy, in the order of `policies`.
+        """
+        self.discard()
+        multiplexer = DolphinMultiplexer([env.dolphin for env in self.envs], timeout=timeout)
+        queue = collections.deque(enumerate(policies))
+        results = [None] * len(policies)
+        attempts = [0] * len(policies)
+        running = {}
+
+        def submit(i):
+            if queue:
+                j, policy = queue.popleft()
+                running[i] = j
+                multiplexer.submit(i, *self.envs[i].dolphin.evaluation_request(policy, **evaluation))
+
+        def complete(i, reply, error):
+            j = running.pop(i)
+            if error is None:
+                results[j] = reply
+                return
+            attempts[j] += 1
+            if attempts[j] <= retries:
+                queue.appendleft((j, policies[j]))
+            else:
+                results[j] = {"error": str(error)}
+
+        self.run_requests(multiplexer, submit, complete)
+        multiplexer.close()
+        for j, _ in queue:
+            results[j] = {"error": "No instance left to run it"}
+        return results
+
+    def start_episode(self, index: int, scheduler: EpisodeScheduler, start_states: dict[EpisodeConfig, Savestate], samples=None) -> EpisodeConfig:
+        """
+        Move instance `index` on to the episode `scheduler` picks for it, restoring that configuration's
+        start state. `samples` is the length of the episode it just finished (None if it was cut short
+        and should not count).
+        """
+        if samples is not None:
+            scheduler.finish(index, samples)
+        config = scheduler.next(index)
+        self.envs[index].restore(start_states[config])
+        return config
+
+    def evaluate_scheduled(
+        self,
+        policy: dict,
+        scheduler: EpisodeScheduler,
+        start_states: dict[EpisodeConfig, Savestate],
+        episodes: int,
+        timeout=None,
+        retries=1,
+        **evaluation,
+    ) -> list[tuple[EpisodeConfig, dict]]:
+        """
+        Run `episodes` in-emulator episodes of `policy` (see `MKWiiEnv.evaluate_policy`) over the pool,
+        each free instance immediately taking the configuration `scheduler` picks for it, so the mix of
+        configurations follows the scheduler's weights in frames. An instance that crashes or exceeds
+        `timeout` is restarted without holding up the others (see `run_requests`) and the episode
+        rescheduled up to `retries` times, then reported with `{"error": ...}` as its summary.
+
+        Returns:
+            `(config, episode summary)` per episode, in completion order. Episodes left over once no
+            instance could run them come last, as `(None, {"error": ...})`.
+        """
+        self.discard()
+        multiplexer = DolphinMultiplexer([env.dolphin for env in self.envs], timeout=timeout)
+        queue = collections.deque([0] * episodes)  # failed attempts of each episode not running yet
+        running = {}
+        results = []
+
+        def submit(i):
+            if queue:
+                running[i] = queue.popleft()
+                start_state = start_states[scheduler.next(i)]
+                multiplexer.submit(i, *self.envs[i].dolphin.evaluation_request(policy, start_state, episodes=1, **evaluation))
+
+        def complete(i, reply, error):
+            attempts = running.pop(i)
+            if error is None:
+                episode = reply["episodes"][0]
+                results.append((scheduler.finish(i, episode["frames"]), episode))
+                return
+            config = scheduler.cancel(i)
+            if attempts < retries:
+                queue.appendleft(attempts + 1)
+            else:
+                results.append((config, {"error": str(error)}))
+
+        self.run_requests(multiplexer, submit, complete)
+        multiplexer.close()
+        results.extend((None, {"error": "No instance left to run it"}) for _ in queue)
+        return results
+
+    def check_alive(self, timeout=1.0) -> list[bool]:
+        """Heartbeat every instance and restart the ones that do not answer. Returns which were alive."""
+        self.drain()
+        alive = []
+        for env in self.envs:
+            env.drain()
+            alive.append(env.dolphin.is_alive(timeout=timeout))
+            if not alive[-1]:
+                env.dolphin.restart()
+        return alive
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+        if self.batch is not None:
+            self.batch.close()